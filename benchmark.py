@@ -0,0 +1,277 @@
+"""
+Reproducible benchmarks of the puzzle solvers on a fixed corpus.
+
+Run ``python benchmark.py`` to solve every corpus puzzle with every solver
+that can handle it.  Each result reports wall time, number of puzzles
+expanded and peak memory, and is written as one JSON object per line so
+that runs from different releases can be compared with ``--baseline``.
+"""
+import json
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from itertools import islice
+from time import perf_counter
+from generators import (ladder_puzzles, mn_puzzles, peg_puzzles,
+                        sudoku_puzzles)
+from puzzle_tools import (breadth_first_solve, depth_first_solve,
+                          in_place_depth_first_solve,
+                          iddfs_solve, SearchStats)
+from sudoku_puzzle import SudokuPuzzle
+from grid_peg_solitaire_puzzle import (ENGLISH_SHAPE, GridPegSolitairePuzzle,
+                                       english_board, triangular_board)
+from mn_puzzle import MNPuzzle
+from word_ladder_puzzle import WordLadderPuzzle
+
+SOLVERS = {"depth_first": depth_first_solve,
+           "breadth_first": breadth_first_solve,
+           "iterative_deepening": iddfs_solve,
+           "in_place_depth_first": in_place_depth_first_solve}
+
+# the three sudokus solved in sudoku_puzzle.py
+SUDOKUS = {
+    "sudoku_star_2015_07_09":
+        ["*", "*", "*", "7", "*", "8", "*", "1", "*",
+         "*", "*", "7", "*", "9", "*", "*", "*", "6",
+         "9", "*", "3", "1", "*", "*", "*", "*", "*",
+         "3", "5", "*", "8", "*", "*", "6", "*", "1",
+         "*", "*", "*", "*", "*", "*", "*", "*", "*",
+         "1", "*", "6", "*", "*", "9", "*", "4", "8",
+         "*", "*", "*", "*", "*", "1", "2", "*", "7",
+         "8", "*", "*", "*", "7", "*", "4", "*", "*",
+         "*", "6", "*", "3", "*", "2", "*", "*", "*"],
+    "sudoku_puzzling_3_star":
+        ["*", "*", "*", "9", "*", "2", "*", "*", "*",
+         "*", "9", "1", "*", "*", "*", "6", "3", "*",
+         "*", "3", "*", "*", "7", "*", "*", "8", "*",
+         "3", "*", "*", "*", "*", "*", "*", "*", "8",
+         "*", "*", "9", "*", "*", "*", "2", "*", "*",
+         "5", "*", "*", "*", "*", "*", "*", "*", "7",
+         "*", "7", "*", "*", "8", "*", "*", "4", "*",
+         "*", "4", "5", "*", "*", "*", "8", "1", "*",
+         "*", "*", "*", "3", "*", "6", "*", "*", "*"],
+    "sudoku_puzzling_4_star":
+        ["5", "6", "*", "*", "*", "7", "*", "*", "9",
+         "*", "7", "*", "*", "4", "8", "*", "3", "1",
+         "*", "*", "*", "*", "*", "*", "*", "*", "*",
+         "4", "3", "*", "*", "*", "*", "*", "*", "*",
+         "*", "8", "*", "*", "*", "*", "*", "9", "*",
+         "*", "*", "*", "*", "*", "*", "*", "2", "6",
+         "*", "*", "*", "*", "*", "*", "*", "*", "*",
+         "1", "9", "*", "3", "6", "*", "*", "7", "*",
+         "7", "*", "*", "1", "*", "*", "*", "4", "2"]}
+
+# (rows, columns, scrambling moves, seed) for each sliding puzzle
+MN_BOARDS = [(3, 3, 20, 1), (3, 4, 16, 2), (4, 4, 14, 3)]
+
+WORD_LADDERS = [("same", "cost"), ("cold", "warm"), ("head", "tail"),
+                ("ape", "man")]
+
+
+def scrambled_mn_puzzle(n, m, moves, seed):
+    """
+    Return an nxm MNPuzzle whose from_grid is reached by making moves
+    random slides from its solved to_grid, chosen by a Random seeded
+    with seed.  A slide never immediately undoes the previous one.
+
+    @type n: int
+    @type m: int
+    @type moves: int
+    @type seed: int
+    @rtype: MNPuzzle
+
+    >>> p = scrambled_mn_puzzle(2, 3, 3, 0)
+    >>> p == scrambled_mn_puzzle(2, 3, 3, 0)
+    True
+    >>> print(MNPuzzle(p.to_grid, p.to_grid))
+    123
+    45*
+    """
+    return next(mn_puzzles(n, m, moves, seed))
+
+
+def corpus(word_file="words.txt", generated=0, seed=0):
+    """
+    Return the benchmark corpus as (name, puzzle, solver names) triples,
+    with generated random puzzles of each kind made from seed added.
+
+    @type word_file: str
+    @type generated: int
+    @type seed: int
+    @rtype: list[(str, Puzzle, list[str])]
+    """
+    digits = {"1", "2", "3", "4", "5", "6", "7", "8", "9"}
+    puzzles = [(name, SudokuPuzzle(9, symbols[:], digits),
+                ["depth_first", "in_place_depth_first"])
+               for name, symbols in sorted(SUDOKUS.items())]
+    peg_5x5 = [["*"] * 5 for _ in range(5)]
+    peg_5x5[3][2] = "."
+    puzzles.append(("peg_5x5", GridPegSolitairePuzzle(peg_5x5,
+                                                       {"*", ".", "#"}),
+                    ["depth_first", "in_place_depth_first"]))
+    puzzles.append(("peg_7x7_english", english_board(),
+                    ["depth_first", "in_place_depth_first"]))
+    puzzles.append(("peg_triangle_5", triangular_board(5),
+                    ["depth_first", "in_place_depth_first"]))
+    for n, m, moves, walk_seed in MN_BOARDS:
+        solvers = ["breadth_first", "iterative_deepening"]
+        if n * m <= 9:
+            # depth first wanders the whole space of larger boards
+            solvers.append("depth_first")
+        puzzles.append(("mn_{}x{}_seed{}".format(n, m, walk_seed),
+                        scrambled_mn_puzzle(n, m, moves, walk_seed), solvers))
+    with open(word_file, "r") as words:
+        word_set = set(words.read().split())
+    for from_word, to_word in WORD_LADDERS:
+        puzzles.append(("ladder_{}_{}".format(from_word, to_word),
+                        WordLadderPuzzle(from_word, to_word, word_set),
+                        ["breadth_first", "depth_first",
+                         "iterative_deepening"]))
+    for kind, puzzle_stream, solvers in [
+            ("sudoku", sudoku_puzzles(9, 30, seed),
+             ["depth_first", "in_place_depth_first"]),
+            ("peg_english", peg_puzzles(ENGLISH_SHAPE, 16, seed),
+             ["depth_first", "in_place_depth_first"]),
+            ("mn_3x3", mn_puzzles(3, 3, 20, seed),
+             ["breadth_first", "iterative_deepening"]),
+            ("ladder", ladder_puzzles(word_set, 5, seed),
+             ["breadth_first"])]:
+        for i, puzzle in enumerate(islice(puzzle_stream, generated)):
+            puzzles.append(("random_{}_{}_{}".format(kind, seed, i), puzzle,
+                            solvers))
+    return puzzles
+
+
+def path_length(node):
+    """
+    Return the number of moves in the solution path starting at node,
+    or None if there is no solution.
+
+    @type node: PuzzleNode | None
+    @rtype: int | None
+    """
+    if node is None:
+        return None
+    length = 0
+    while node.children:
+        node, length = node.children[0], length + 1
+    return length
+
+
+def run(name, puzzle, solver, memory=True):
+    """
+    Solve puzzle with the solver named solver and return a record of
+    the time, work and memory it took.
+
+    The timed solve is separate from the memory measuring solve, since
+    tracemalloc slows allocation down considerably.
+
+    @type name: str
+    @type puzzle: Puzzle
+    @type solver: str
+    @type memory: bool
+    @rtype: dict[str, Any]
+    """
+    solve = SOLVERS[solver]
+    stats = SearchStats()
+    start = perf_counter()
+    solution = solve(puzzle, stats)
+    seconds = perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        solve(puzzle)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    record = {"puzzle": name, "solver": solver, "seconds": seconds,
+              "solved": solution is not None,
+              "length": path_length(solution), "peak_memory": peak}
+    record.update(("stats_" + k, v) for k, v in stats.as_dict().items())
+    return record
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Return the records in results that took more than tolerance times
+    as long as the matching record in baseline.
+
+    @type results: list[dict[str, Any]]
+    @type baseline: list[dict[str, Any]]
+    @type tolerance: float
+    @rtype: list[dict[str, Any]]
+
+    >>> old = [{"puzzle": "p", "solver": "s", "seconds": 1.0}]
+    >>> new = [{"puzzle": "p", "solver": "s", "seconds": 1.6}]
+    >>> [r["seconds"] for r in regressions(new, old, 1.5)]
+    [1.6]
+    >>> regressions(new, old, 2.0)
+    []
+    """
+    before = {(r["puzzle"], r["solver"]): r["seconds"] for r in baseline}
+    return [r for r in results
+            if (r["puzzle"], r["solver"]) in before and
+            r["seconds"] > before[(r["puzzle"], r["solver"])] * tolerance]
+
+
+def main(argv=None):
+    """
+    Run the benchmarks selected by the command line arguments argv and
+    return the process exit status: 1 if a regression was found, else 0.
+
+    @type argv: list[str] | None
+    @rtype: int
+    """
+    parser = ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--only", default="",
+                        help="only run puzzles whose name contains this")
+    parser.add_argument("--solver", choices=sorted(SOLVERS),
+                        help="only run this solver")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the peak memory measurement")
+    parser.add_argument("--output", help="write JSON lines here")
+    parser.add_argument("--baseline",
+                        help="JSON lines from an earlier run to compare to")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="slowdown factor counted as a regression")
+    parser.add_argument("--words", default="words.txt")
+    parser.add_argument("--generated", type=int, default=0,
+                        help="also run this many random puzzles of each "
+                             "kind")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random puzzles")
+    args = parser.parse_args(argv)
+    results = []
+    for name, puzzle, solvers in corpus(args.words, args.generated,
+                                        args.seed):
+        if args.only not in name:
+            continue
+        for solver in solvers:
+            if args.solver is None or args.solver == solver:
+                record = run(name, puzzle, solver, not args.no_memory)
+                results.append(record)
+                print("{:24} {:20} {:9.3f}s {:9} nodes {:>12} bytes".format(
+                    name, solver, record["seconds"],
+                    record["stats_expanded"], str(record["peak_memory"])),
+                    file=sys.stderr)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in results:
+            out.write(json.dumps(record, sort_keys=True) + "\n")
+    finally:
+        if args.output:
+            out.close()
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = [json.loads(line) for line in baseline_file
+                        if line.strip()]
+        slow = regressions(results, baseline, args.tolerance)
+        for record in slow:
+            print("regression: {} {}".format(record["puzzle"],
+                                             record["solver"]),
+                  file=sys.stderr)
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""
+Breadth first search that keeps its layers on disk instead of in memory.
+
+Every layer of the search is a file of sorted, fixed-length keys made by
+Puzzle.encode.  A layer is expanded a key at a time; the keys of the
+extensions are collected in memory until buffer_size of them are held,
+then sorted into a run file.  The runs are merged into the next layer,
+dropping duplicates and keys already in the two previous layers.  That
+is enough to rule out every repeated puzzle when each move can be
+undone (MNPuzzle, WordLadderPuzzle) or when no puzzle can come back
+(GridPegSolitairePuzzle loses a peg and SudokuPuzzle fills a position
+on every move).
+
+Progress is saved after each layer, so a search interrupted by a crash
+carries on from its last finished layer when it is run again with the
+same directory.  A directory holds the search of one start and one
+family, from Puzzle.family, so a search toward another goal can not
+pick up its layers.
+"""
+import heapq
+import json
+import os
+from puzzle_tools import PuzzleNode
+
+# keys read or written per file operation
+_CHUNK = 4096
+
+
+class ExternalBFS:
+    """
+    A breadth first search of a puzzle whose layers are stored in
+    directory.
+
+    === Attributes ===
+    @type puzzle: Puzzle
+        the puzzle the search starts from
+    @type directory: str
+        where layer files and progress are kept
+    @type buffer_size: int
+        most extension keys held in memory before writing a run
+    @type layers: list[int]
+        number of keys in each finished layer
+    @type solved_depth: int | None
+        layer of the first solved puzzle found, if any
+    @type complete: bool
+        whether every reachable puzzle has been searched
+
+    >>> import tempfile
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2"), ("3", "*"))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     search = ExternalBFS(MNPuzzle(goal, goal), directory, 5)
+    ...     search.run(stop_when_solved=False)
+    [1, 2, 2, 2, 2, 2, 1]
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog", "cut"}
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     _ = ExternalBFS(WordLadderPuzzle("cat", "dog", words), directory)
+    ...     try:
+    ...         ExternalBFS(WordLadderPuzzle("cat", "cut", words), directory)
+    ...     except ValueError as error:
+    ...         print(str(error).replace(directory, "<directory>"))
+    <directory> holds a search toward another goal
+    """
+
+    def __init__(self, puzzle, directory, buffer_size=1000000):
+        """
+        Create a new ExternalBFS self from puzzle in directory, picking
+        up the progress of an earlier search from puzzle there.  Raise
+        ValueError if directory holds a search from another puzzle or
+        toward another goal.
+
+        @type self: ExternalBFS
+        @type puzzle: Puzzle
+        @type directory: str
+        @type buffer_size: int
+        @rtype: None
+        """
+        assert buffer_size > 0
+        self.puzzle, self.directory = puzzle, directory
+        self.buffer_size = buffer_size
+        self._start, self._family = puzzle.encode(), puzzle.family()
+        self._width = len(self._start)
+        self.layers, self.solved_depth, self.complete = [], None, False
+        self._solved = None
+        os.makedirs(directory, exist_ok=True)
+        progress = os.path.join(directory, "progress.json")
+        if os.path.exists(progress):
+            with open(progress, "r") as progress_file:
+                saved = json.load(progress_file)
+            if saved["start"] != self._start.hex():
+                raise ValueError("{} holds a search from another "
+                                 "puzzle".format(directory))
+            if saved.get("family") != self._family:
+                raise ValueError("{} holds a search toward another "
+                                 "goal".format(directory))
+            self.layers, self.complete = saved["layers"], saved["complete"]
+            # runs and partly written files from an interrupted layer
+            self._remove([os.path.join(directory, name)
+                          for name in os.listdir(directory)
+                          if name.startswith("run_") or
+                          name.endswith(".tmp")])
+            self.solved_depth = saved["solved_depth"]
+            if saved["solved"] is not None:
+                self._solved = bytes.fromhex(saved["solved"])
+        else:
+            self._write_layer(0, iter([self._start]))
+            self.layers = [1]
+            self._save()
+
+    def run(self, stop_when_solved=True, max_depth=None, stats=None):
+        """
+        Search layer by layer until a solved puzzle is found, when
+        stop_when_solved is True, until every reachable puzzle has been
+        searched, or until layer max_depth is written.  Return the
+        number of keys in each layer.
+
+        @type self: ExternalBFS
+        @type stop_when_solved: bool
+        @type max_depth: int | None
+        @type stats: SearchStats | None
+        @rtype: list[int]
+        """
+        if stats is not None:
+            stats.start()
+        while not (self.complete or
+                   (stop_when_solved and self.solved_depth is not None) or
+                   (max_depth is not None and
+                    len(self.layers) > max_depth)):
+            self._expand(len(self.layers) - 1, stop_when_solved, stats)
+        if stats is not None:
+            stats.stop()
+        return self.layers
+
+    def solution(self):
+        """
+        Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+        containing the solved puzzle found by run, or None if run found
+        none.
+
+        The path is traced back one layer at a time, looking in each
+        layer for a key with an extension equal to the next puzzle.
+
+        @type self: ExternalBFS
+        @rtype: PuzzleNode | None
+        """
+        if self._solved is None:
+            return None
+        keys = [self._solved]
+        for depth in range(self.solved_depth - 1, -1, -1):
+            for key in self._read_layer(depth):
+                if any([extension.encode() == keys[-1] for extension
+                        in self.puzzle.decode(key).extensions()]):
+                    keys.append(key)
+                    break
+        node = None
+        for key in keys:
+            node = PuzzleNode(self.puzzle.decode(key),
+                              [] if node is None else [node])
+        return node
+
+    def _expand(self, depth, stop_when_solved, stats):
+        """
+        Check the puzzles in layer depth for a solution and write the
+        next layer from their extensions.
+
+        @type self: ExternalBFS
+        @type depth: int
+        @type stop_when_solved: bool
+        @type stats: SearchStats | None
+        @rtype: None
+        """
+        runs, buffer = [], set()
+        for key in self._read_layer(depth):
+            puzzle = self.puzzle.decode(key)
+            if self._solved is None and puzzle.is_solved():
+                self._solved, self.solved_depth = key, depth
+                if stop_when_solved:
+                    self._save()
+                    self._remove(runs)
+                    return
+            if puzzle.fail_fast():
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            if stats is None:
+                extensions = puzzle.extensions()
+            else:
+                extensions = stats.expand(puzzle)
+            for extension in extensions:
+                buffer.add(extension.encode())
+            if len(buffer) >= self.buffer_size:
+                runs.append(self._write_run(depth, len(runs), buffer))
+                buffer = set()
+        if buffer:
+            runs.append(self._write_run(depth, len(runs), buffer))
+        merged = _unique(heapq.merge(*[self._read(run) for run in runs]))
+        for old in range(max(depth - 1, 0), depth + 1):
+            merged = _difference(merged, self._read_layer(old))
+        size = self._write_layer(depth + 1, merged)
+        self._remove(runs)
+        if size:
+            self.layers.append(size)
+            if stats is not None:
+                stats.see(sum(self.layers), size)
+        else:
+            os.remove(self._layer_path(depth + 1))
+            self.complete = True
+        self._save()
+
+    def _layer_path(self, depth):
+        """
+        Return the path of the file holding layer depth.
+
+        @type self: ExternalBFS
+        @type depth: int
+        @rtype: str
+        """
+        return os.path.join(self.directory, "layer_{:05}.bin".format(depth))
+
+    def _read_layer(self, depth):
+        """
+        Yield the keys of layer depth in sorted order.
+
+        @type self: ExternalBFS
+        @type depth: int
+        @rtype: Iterator[bytes]
+        """
+        return self._read(self._layer_path(depth))
+
+    def _read(self, path):
+        """
+        Yield the keys stored in the file at path.
+
+        @type self: ExternalBFS
+        @type path: str
+        @rtype: Iterator[bytes]
+        """
+        width = self._width
+        with open(path, "rb") as keys:
+            chunk = keys.read(width * _CHUNK)
+            while chunk:
+                for i in range(0, len(chunk), width):
+                    yield chunk[i:i + width]
+                chunk = keys.read(width * _CHUNK)
+
+    def _write(self, path, keys):
+        """
+        Write keys to the file at path, replacing it only once every key
+        is written, and return how many keys were written.
+
+        @type self: ExternalBFS
+        @type path: str
+        @type keys: Iterator[bytes]
+        @rtype: int
+        """
+        count, chunk = 0, []
+        with open(path + ".tmp", "wb") as out:
+            for key in keys:
+                if len(key) != self._width:
+                    raise ValueError("encode gave keys of different lengths")
+                chunk.append(key)
+                if len(chunk) == _CHUNK:
+                    out.write(b"".join(chunk))
+                    count, chunk = count + len(chunk), []
+            out.write(b"".join(chunk))
+            count += len(chunk)
+        os.replace(path + ".tmp", path)
+        return count
+
+    def _write_layer(self, depth, keys):
+        """
+        Write the sorted keys of layer depth and return how many there
+        were.
+
+        @type self: ExternalBFS
+        @type depth: int
+        @type keys: Iterator[bytes]
+        @rtype: int
+        """
+        return self._write(self._layer_path(depth), keys)
+
+    def _write_run(self, depth, number, keys):
+        """
+        Write the set keys, sorted, as run number of the layer after
+        depth and return the path of the run.
+
+        @type self: ExternalBFS
+        @type depth: int
+        @type number: int
+        @type keys: set[bytes]
+        @rtype: str
+        """
+        path = os.path.join(self.directory,
+                            "run_{:05}_{:05}.bin".format(depth + 1, number))
+        self._write(path, iter(sorted(keys)))
+        return path
+
+    def _remove(self, paths):
+        """
+        Remove the files at paths.
+
+        @type self: ExternalBFS
+        @type paths: list[str]
+        @rtype: None
+        """
+        for path in paths:
+            os.remove(path)
+
+    def _save(self):
+        """
+        Save the progress of ExternalBFS self in its directory.
+
+        @type self: ExternalBFS
+        @rtype: None
+        """
+        path = os.path.join(self.directory, "progress.json")
+        with open(path + ".tmp", "w") as progress:
+            json.dump({"start": self._start.hex(), "family": self._family,
+                       "layers": self.layers,
+                       "complete": self.complete,
+                       "solved_depth": self.solved_depth,
+                       "solved": (None if self._solved is None
+                                  else self._solved.hex())}, progress)
+        os.replace(path + ".tmp", path)
+
+
+def external_breadth_first_solve(puzzle, directory, buffer_size=1000000,
+                                 stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, found by an ExternalBFS in directory, with each child
+    PuzzleNode containing an extension of the puzzle in its parent.
+    Return None if this is not possible.
+
+    @type puzzle: Puzzle
+    @type directory: str
+    @type buffer_size: int
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | None
+
+    >>> import tempfile
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog", "cut"}
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     node = external_breadth_first_solve(
+    ...         WordLadderPuzzle("cat", "dog", words), directory)
+    >>> [str(p) for p in node.path()]
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
+    """
+    search = ExternalBFS(puzzle, directory, buffer_size)
+    search.run(stats=stats)
+    return search.solution()
+
+
+def _unique(keys):
+    """
+    Yield the sorted keys, skipping repeats.
+
+    @type keys: Iterator[bytes]
+    @rtype: Iterator[bytes]
+
+    >>> list(_unique(iter([b"a", b"a", b"b"])))
+    [b'a', b'b']
+    """
+    previous = None
+    for key in keys:
+        if key != previous:
+            yield key
+            previous = key
+
+
+def _difference(keys, others):
+    """
+    Yield the sorted keys that are not among the sorted others.
+
+    @type keys: Iterator[bytes]
+    @type others: Iterator[bytes]
+    @rtype: Iterator[bytes]
+
+    >>> list(_difference(iter([b"a", b"b", b"d"]), iter([b"b", b"c"])))
+    [b'a', b'd']
+    """
+    other = next(others, None)
+    for key in keys:
+        while other is not None and other < key:
+            other = next(others, None)
+        if key != other:
+            yield key
@@ -0,0 +1,253 @@
+"""
+Random puzzles that are sure to be solvable, for load tests and
+benchmarks.
+
+Every generator takes a seed, so the same seed gives the same puzzles,
+and a difficulty, and yields puzzles one at a time without end, so any
+number can be taken with itertools.islice and fed straight to a solver,
+the benchmark or a SudokuBatch:
+
+- mn_puzzles slides blocks at random away from the goal, or shuffles
+  the blocks and fixes the parity so the goal can be reached;
+- peg_puzzles plays jumps backwards from a single peg, so playing them
+  forwards wins;
+- sudoku_puzzles permutes the rows, columns and symbols of a solved
+  grid and removes clues while the solution stays unique;
+- ladder_puzzles picks pairs of words a given number of steps apart in
+  the same connected part of the dictionary.
+"""
+import random
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle, jump_table
+from mn_puzzle import MNPuzzle
+from sudoku_puzzle import SudokuPuzzle, remove_clues
+from word_ladder_puzzle import WordLadderPuzzle
+
+# failed tries in a row before a generator gives up on a difficulty
+_ATTEMPTS = 1000
+
+
+def mn_puzzles(n, m, moves=None, seed=None):
+    """
+    Yield nxm MNPuzzles whose to_grid has the blocks 1 to n * m - 1 in
+    order followed by "*".  If moves is given, each from_grid is reached
+    by making moves random slides from the to_grid, never undoing the
+    slide just made unless it is the only one; otherwise the blocks are
+    shuffled, and two of them swapped if the goal could not be reached.
+
+    @type n: int
+    @type m: int
+    @type moves: int | None
+    @type seed: int | None
+    @rtype: Iterator[MNPuzzle]
+
+    >>> from itertools import islice
+    >>> from puzzle_tools import breadth_first_solve
+    >>> puzzles = list(islice(mn_puzzles(2, 3, seed=4), 5))
+    >>> all([breadth_first_solve(p) is not None for p in puzzles])
+    True
+    >>> print(next(mn_puzzles(2, 3, 3, 0)))
+    *23
+    145
+    >>> [str(p) for p in islice(mn_puzzles(1, 2, 3, 0), 2)]
+    ['*1', '*1']
+    """
+    symbols = [str(i + 1) for i in range(n * m - 1)] + ["*"]
+    to_grid = tuple([tuple(symbols[r * m:(r + 1) * m]) for r in range(n)])
+    rng = random.Random(seed)
+    while True:
+        if moves is None:
+            blocks = symbols[:]
+            rng.shuffle(blocks)
+            if not _reachable(blocks, symbols, m):
+                # swapping two blocks other than "*" flips the parity
+                i, j = [k for k in range(len(blocks))
+                        if blocks[k] != "*"][:2]
+                blocks[i], blocks[j] = blocks[j], blocks[i]
+            yield MNPuzzle(tuple([tuple(blocks[r * m:(r + 1) * m])
+                                  for r in range(n)]), to_grid)
+        else:
+            puzzle, previous = MNPuzzle(to_grid, to_grid), None
+            for _ in range(moves):
+                choices = [p for p in puzzle.extensions() if p != previous]
+                # on a 1x2 board the only slide undoes the last one
+                previous, puzzle = puzzle, rng.choice(choices or
+                                                      puzzle.extensions())
+            yield puzzle
+
+
+def peg_puzzles(shape, pegs, seed=None, move_set="orthogonal"):
+    """
+    Yield GridPegSolitairePuzzles on board shape, rows of "#" for unused
+    cells and "o" for holes separated by "/", with pegs pegs each, that
+    can be won.  Each is made by putting one peg in a random hole and
+    undoing random jumps in move_set until there are pegs pegs.
+
+    @type shape: str
+    @type pegs: int
+    @type seed: int | None
+    @type move_set: str
+    @rtype: Iterator[GridPegSolitairePuzzle]
+
+    >>> from itertools import islice
+    >>> from grid_peg_solitaire_puzzle import ENGLISH_SHAPE
+    >>> from puzzle_tools import in_place_depth_first_solve
+    >>> boards = list(islice(peg_puzzles(ENGLISH_SHAPE, 12, seed=1), 3))
+    >>> [str(board).count("*") for board in boards]
+    [12, 12, 12]
+    >>> all([in_place_depth_first_solve(b) is not None for b in boards])
+    True
+    """
+    rows = shape.split("/")
+    width = len(rows[0])
+    cells = "".join(rows)
+    holes = [i for i, hole in enumerate(cells) if hole != "#"]
+    assert 0 < pegs < len(holes)
+    jumps = jump_table(shape, move_set)
+    rng = random.Random(seed)
+    failures = 0
+    while True:
+        board = {rng.choice(holes)}
+        while len(board) < pegs:
+            # a jump from start over over to end is undone by taking the
+            # peg at end back to start and putting back the one at over
+            undos = [(start, over, end) for start, over, end, _ in jumps
+                     if end in board and start not in board and
+                     over not in board]
+            if not undos:
+                break
+            start, over, end = rng.choice(undos)
+            board.remove(end)
+            board.update((start, over))
+        if len(board) < pegs:
+            failures += 1
+            if failures == _ATTEMPTS:
+                raise ValueError("could not place {} pegs".format(pegs))
+            continue
+        failures = 0
+        grid = [["#" if cells[i] == "#" else "*" if i in board else "."
+                 for i in range(r * width, (r + 1) * width)]
+                for r in range(len(rows))]
+        yield GridPegSolitairePuzzle(grid, {"*", ".", "#"}, move_set)
+
+
+def sudoku_puzzles(n=9, clues=30, seed=None, symbols="123456789"):
+    """
+    Yield nxn SudokuPuzzles with a single solution each, using the first
+    n of symbols, with as few clues as removing them in a random order
+    leaves, but no fewer than clues.
+
+    Each solved grid is a fixed pattern with its symbols relabelled, its
+    rows shuffled within and by bands, its columns shuffled within and
+    by stacks, and half the time turned on its diagonal.
+
+    @type n: int
+    @type clues: int
+    @type seed: int | None
+    @type symbols: str
+    @rtype: Iterator[SudokuPuzzle]
+
+    >>> from sudoku_puzzle import count_solutions
+    >>> puzzle = next(sudoku_puzzles(4, 6, seed=2, symbols="ABCD"))
+    >>> count_solutions(puzzle)
+    1
+    >>> 16 - str(puzzle).count("*") >= 6
+    True
+    """
+    assert len(symbols) >= n
+    r = round(n ** (1 / 2))
+    rng = random.Random(seed)
+    while True:
+        labels = list(symbols[:n])
+        rng.shuffle(labels)
+        order = []
+        for _ in range(2):
+            bands = rng.sample(range(r), r)
+            order.append([band * r + i for band in bands
+                          for i in rng.sample(range(r), r)])
+        rows, columns = order
+        # in the pattern, row i and column j hold symbol number
+        # (r * (i % r) + i // r + j) % n; read with i and j swapped it is
+        # turned on its diagonal
+        if rng.random() < 0.5:
+            grid = [labels[(r * (i % r) + i // r + j) % n]
+                    for i in rows for j in columns]
+        else:
+            grid = [labels[(r * (j % r) + j // r + i) % n]
+                    for i in rows for j in columns]
+        puzzle = SudokuPuzzle(n, grid, set(labels))
+        for puzzle in remove_clues(puzzle, rng.randrange(2 ** 32), clues):
+            pass
+        yield puzzle
+
+
+def ladder_puzzles(words, steps, seed=None, index=None):
+    """
+    Yield WordLadderPuzzles on the set words whose shortest ladders take
+    exactly steps steps.  Each starts from a random word and goes to a
+    random word steps steps away in the same connected part of words.
+
+    Distances are found a layer at a time by index, a WordIndex of
+    words, which is built if it is not given.
+
+    @type words: set[str]
+    @type steps: int
+    @type seed: int | None
+    @type index: WordIndex | None
+    @rtype: Iterator[WordLadderPuzzle]
+
+    >>> from puzzle_tools import breadth_first_solve
+    >>> words = {"cat", "cot", "cog", "dog", "cut", "bat", "bag"}
+    >>> ladder = next(ladder_puzzles(words, 3, seed=0))
+    >>> len(breadth_first_solve(ladder, path_only=True)) - 1
+    3
+    """
+    if index is None:
+        from word_index import WordIndex
+        index = WordIndex(words)
+    pool = sorted(words)
+    rng = random.Random(seed)
+    failures = 0
+    while True:
+        start = rng.choice(pool)
+        for depth, layer in enumerate(index.layers(start)):
+            if depth == steps:
+                failures = 0
+                yield WordLadderPuzzle(start, rng.choice(sorted(layer)),
+                                       words)
+                break
+        else:
+            failures += 1
+            if failures == _ATTEMPTS:
+                raise ValueError("no words are {} steps apart".format(steps))
+
+
+def _reachable(blocks, goal, m):
+    """
+    Return whether the blocks of an MNPuzzle with m columns, listed
+    across the rows, can be slid into the order of goal.
+
+    That is so exactly when the permutation taking blocks to goal,
+    counting "*" as a block, and the distance "*" has to travel are
+    both even or both odd.
+
+    @type blocks: list[str]
+    @type goal: list[str]
+    @type m: int
+    @rtype: bool
+
+    >>> _reachable(["1", "2", "*", "3"], ["1", "2", "3", "*"], 2)
+    True
+    >>> _reachable(["2", "1", "3", "*"], ["1", "2", "3", "*"], 2)
+    False
+    """
+    place = {block: i for i, block in enumerate(goal)}
+    permutation = [place[block] for block in blocks]
+    swaps, seen = 0, [False] * len(blocks)
+    for i in range(len(blocks)):
+        j, length = i, 0
+        while not seen[j]:
+            seen[j], j, length = True, permutation[j], length + 1
+        swaps += max(length - 1, 0)
+    here, there = blocks.index("*"), place["*"]
+    distance = abs(here // m - there // m) + abs(here % m - there % m)
+    return swaps % 2 == distance % 2
@@ -5,9 +5,13 @@ class GridPegSolitairePuzzle(Puzzle):
     """
     Snapshot of peg solitaire on a rectangular grid. May be solved,
     unsolved, or even unsolvable.
+
+    === Attributes ===
+    @type move_set: str
+        key of MOVE_SETS naming the directions pegs may jump in
     """
 
-    def __init__(self, marker, marker_set):
+    def __init__(self, marker, marker_set, move_set="orthogonal"):
         """
         Create a new GridPegSolitairePuzzle self with
         marker indicating pegs, spaces, and unused
@@ -16,6 +20,7 @@ class GridPegSolitairePuzzle(Puzzle):
         @type marker: list[list[str]]
         @type marker_set: set[str]
                           "#" for unused, "*" for peg, "." for empty
+        @type move_set: str
         """
         assert isinstance(marker, list)
         # J: making sure it't not an empty board
@@ -26,7 +31,15 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([all(x in marker_set for x in row) for row in marker])
         # J: making sure the market set is valid
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])
+        assert move_set in MOVE_SETS
         self._marker, self._marker_set = marker, marker_set
+        self.move_set = move_set
+        # number of pegs, handed down by the puzzle this one is made from
+        # so is_solved is a single check; counted when first needed
+        self._pegs = None
+        # jump table of the board shape, looked up when first needed and
+        # handed on to puzzles made from this one
+        self._table = None
 
     def __eq__(self, other):
         """
@@ -56,7 +69,8 @@ class GridPegSolitairePuzzle(Puzzle):
 
         return (type(self) == type(other)
                 and (self._marker == other._marker)
-                and (self._marker_set == other._marker_set))
+                and (self._marker_set == other._marker_set)
+                and (self.move_set == other.move_set))
 
     def __str__(self):
         """
@@ -102,8 +116,210 @@ class GridPegSolitairePuzzle(Puzzle):
         >>> gpsp2.is_solved()
         False
         """
-        all_markers  = sum(self._marker, [])
-        return all_markers.count("*") == 1
+        return self._count_pegs() == 1
+
+    def encode(self):
+        """
+        Return a bytes key for GridPegSolitairePuzzle self, one bit per
+        cell that is not "#", set when the cell holds a peg.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bytes
+
+        >>> grid = [["#", "*", "."], [".", "*", "*"]]
+        >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> gpsp.encode()
+        b'\\x13'
+        >>> gpsp.decode(gpsp.encode()) == gpsp
+        True
+        """
+        bits, cells = 0, 0
+        for row in self._marker:
+            for marker in row:
+                if marker != "#":
+                    bits = (bits << 1) | (marker == "*")
+                    cells += 1
+        return bits.to_bytes((cells + 7) // 8, "big")
+
+    def decode(self, key):
+        """
+        Return the GridPegSolitairePuzzle with the unused cells of
+        GridPegSolitairePuzzle self and the pegs encoded in key.
+
+        @type self: GridPegSolitairePuzzle
+        @type key: bytes
+        @rtype: GridPegSolitairePuzzle
+        """
+        bits = int.from_bytes(key, "big")
+        shift = sum([len(row) - row.count("#") for row in self._marker])
+        grid = []
+        for row in self._marker:
+            new_row = []
+            for marker in row:
+                if marker == "#":
+                    new_row.append("#")
+                else:
+                    shift -= 1
+                    new_row.append("*" if (bits >> shift) & 1 else ".")
+            grid.append(new_row)
+        return self._child(grid, None)
+
+    def family(self):
+        """
+        Return the family of GridPegSolitairePuzzle self, given by its
+        board shape and move set.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: str
+
+        >>> grid = [["#", "*", "."], [".", "*", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).family()
+        'GridPegSolitairePuzzle #oo/ooo orthogonal'
+        """
+        return "GridPegSolitairePuzzle {} {}".format(
+            board_shape(self._marker), self.move_set)
+
+    def move_to(self, extension):
+        """
+        Return the move from GridPegSolitairePuzzle self to extension:
+        the position, counted across the rows, of the peg that jumps,
+        and the direction it jumps in, 0 to 3 for up, down, left, right
+        and 4 to 7 for up-left, up-right, down-left, down-right.
+
+        @type self: GridPegSolitairePuzzle
+        @type extension: GridPegSolitairePuzzle
+        @rtype: (int, int)
+
+        >>> grid = [["*", "*", ".", "*", "*"]]
+        >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> [gpsp.move_to(e) for e in gpsp.extensions()]
+        [(0, 3), (4, 2)]
+        >>> gpsp.make_move((4, 2)) == gpsp.extensions()[1]
+        True
+        """
+        before, after = sum(self._marker, []), sum(extension._marker, [])
+        for start, over, end, direction in self._jumps():
+            if (before[start] == before[over] == after[end] == "*" and
+                    after[start] == after[over] == before[end] == "."):
+                return start, direction
+
+    def make_move(self, move):
+        """
+        Return the GridPegSolitairePuzzle reached from
+        GridPegSolitairePuzzle self by move, made by move_to.
+
+        @type self: GridPegSolitairePuzzle
+        @type move: (int, int)
+        @rtype: GridPegSolitairePuzzle
+        """
+        start, direction = move
+        width = len(self._marker[0])
+        row, col = start // width, start % width
+        dr, dc = _DIRECTIONS[direction]
+        grid = [r[:] for r in self._marker]
+        assert grid[row][col] == grid[row + dr][col + dc] == "*"
+        assert grid[row + 2 * dr][col + 2 * dc] == "."
+        grid[row][col] = grid[row + dr][col + dc] = "."
+        grid[row + 2 * dr][col + 2 * dc] = "*"
+        return self._child(grid, self._count_pegs() - 1)
+
+    def moves(self):
+        """
+        Return the moves of every legal jump in GridPegSolitairePuzzle
+        self, in the same order as extensions.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: list[(int, int)]
+
+        >>> grid = [["*", "*", ".", "*", "*"]]
+        >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> gpsp.moves()
+        [(0, 3), (4, 2)]
+        >>> gpsp.apply((0, 3))
+        >>> print(gpsp)
+        ..***
+        >>> gpsp.undo((0, 3))
+        >>> print(gpsp)
+        **.**
+        """
+        if self._count_pegs() == 1:
+            return []
+        cells = [marker for row in self._marker for marker in row]
+        return [(start, direction)
+                for start, over, end, direction in self._jumps()
+                if cells[start] == "*" and cells[over] == "*" and
+                cells[end] == "."]
+
+    def apply(self, move):
+        """
+        Make the jump move in GridPegSolitairePuzzle self in place.
+
+        @type self: GridPegSolitairePuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        self._pegs = self._count_pegs() - 1
+        self._jump(move, ".", "*")
+
+    def undo(self, move):
+        """
+        Take back the jump move in GridPegSolitairePuzzle self in place.
+
+        @type self: GridPegSolitairePuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        self._pegs = self._count_pegs() + 1
+        self._jump(move, "*", ".")
+
+    def _jump(self, move, left, landed):
+        # Set the start and jumped-over positions of move in
+        # GridPegSolitairePuzzle self to left, and its end to landed.
+        #
+        # @type self: GridPegSolitairePuzzle
+        # @type move: (int, int)
+        # @type left: str
+        # @type landed: str
+        start, direction = move
+        width = len(self._marker[0])
+        row, col = start // width, start % width
+        dr, dc = _DIRECTIONS[direction]
+        self._marker[row][col] = self._marker[row + dr][col + dc] = left
+        self._marker[row + 2 * dr][col + 2 * dc] = landed
+
+    def _jumps(self):
+        # Return the jump table of the board shape and move set of
+        # GridPegSolitairePuzzle self.
+        #
+        # @type self: GridPegSolitairePuzzle
+        # @rtype: tuple[(int, int, int, int)]
+        if self._table is None:
+            self._table = jump_table(board_shape(self._marker),
+                                     self.move_set)
+        return self._table
+
+    def _child(self, grid, pegs):
+        # Return the GridPegSolitairePuzzle with grid, holding pegs pegs or
+        # None if not known, on the board of GridPegSolitairePuzzle self,
+        # sharing its jump table.
+        #
+        # @type self: GridPegSolitairePuzzle
+        # @type grid: list[list[str]]
+        # @type pegs: int | None
+        # @rtype: GridPegSolitairePuzzle
+        child = GridPegSolitairePuzzle(grid, self._marker_set, self.move_set)
+        child._table, child._pegs = self._table, pegs
+        return child
+
+    def _count_pegs(self):
+        # Return the number of pegs of GridPegSolitairePuzzle self,
+        # counting them the first time they are needed.
+        #
+        # @type self: GridPegSolitairePuzzle
+        # @rtype: int
+        if self._pegs is None:
+            self._pegs = sum([row.count("*") for row in self._marker])
+        return self._pegs
 
     def extensions(self):
         """
@@ -159,26 +375,173 @@ class GridPegSolitairePuzzle(Puzzle):
         """
 
         # Convenient names.
-        marker, marker_set = self._marker, self._marker_set
-        if sum([row.count("*") for row in marker]) == 1 or all(["." not in row
-                                                                for row in
-                                                                marker]):
+        marker = self._marker
+        if self._count_pegs() == 1 or all(["." not in row for row in marker]):
             # Return an empty list.
             return [_ for _ in []]
         else:
-            legal_jumps = _available_jumps(self._marker)
+            legal_jumps = _available_jumps(self._marker, self._jumps())
             # For each piece in board, if there is an available jump add the
             # list[list[str]] to jumps.
-            return [GridPegSolitairePuzzle(new_grid, marker_set) for
-                    new_grid in legal_jumps]
+            pegs = self._pegs - 1
+            return [self._child(new_grid, pegs) for new_grid in legal_jumps]
+
+
+# row and column steps of a jump in each direction, numbered as in moves
+_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1),
+               (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+# directions, as indexes of _DIRECTIONS, that each move set allows.
+# Triangular boards are drawn with row r using columns 0 to r, so their
+# third line of holes runs from up-left to down-right.
+MOVE_SETS = {"orthogonal": (0, 1, 2, 3),
+             "triangular": (0, 1, 2, 3, 4, 7),
+             "diagonal": (0, 1, 2, 3, 4, 5, 6, 7)}
+
+# board shapes, "#" for unused cells and "o" for holes, rows separated
+# by "/"
+ENGLISH_SHAPE = "##ooo##/##ooo##/ooooooo/ooooooo/ooooooo/##ooo##/##ooo##"
+EUROPEAN_SHAPE = "##ooo##/#ooooo#/ooooooo/ooooooo/ooooooo/#ooooo#/##ooo##"
+
+# jump tables already compiled, by board shape and move set
+_JUMP_TABLES = {}
+
+
+def board_shape(grid):
+    """
+    Return the board shape of grid, "#" for unused cells and "o" for
+    the others, with rows separated by "/".
+
+    @type grid: list[list[str]]
+    @rtype: str
+
+    >>> board_shape([["#", "*", "#"], ["*", ".", "*"]])
+    '#o#/ooo'
+    """
+    return "/".join(["".join(["#" if marker == "#" else "o"
+                              for marker in row]) for row in grid])
+
+
+def jump_table(shape, move_set="orthogonal"):
+    """
+    Return the (start, over, end, direction) of every jump on board
+    shape in a direction move_set allows, with positions counted across
+    the rows, ordered by start and then direction.
+
+    A table is compiled once for each shape and move set and then
+    shared, so finding jumps checks only the cells some jump can use.
+
+    @type shape: str
+    @type move_set: str
+    @rtype: tuple[(int, int, int, int)]
+
+    >>> jump_table("ooo")
+    ((0, 1, 2, 3), (2, 1, 0, 2))
+    >>> len(jump_table(ENGLISH_SHAPE)), len(jump_table(EUROPEAN_SHAPE))
+    (76, 92)
+    >>> len(jump_table("o##/oo#/ooo", "triangular"))
+    6
+    """
+    key = (shape, move_set)
+    if key not in _JUMP_TABLES:
+        rows = shape.split("/")
+        height, width = len(rows), len(rows[0])
+        table = []
+        for row in range(height):
+            for col in range(width):
+                for direction in MOVE_SETS[move_set]:
+                    dr, dc = _DIRECTIONS[direction]
+                    end_row, end_col = row + 2 * dr, col + 2 * dc
+                    if (0 <= end_row < height and 0 <= end_col < width and
+                            rows[row][col] != "#" and
+                            rows[row + dr][col + dc] != "#" and
+                            rows[end_row][end_col] != "#"):
+                        table.append((row * width + col,
+                                      (row + dr) * width + col + dc,
+                                      end_row * width + end_col, direction))
+        _JUMP_TABLES[key] = tuple(table)
+    return _JUMP_TABLES[key]
+
+
+def shape_puzzle(shape, empty, move_set="orthogonal"):
+    """
+    Return the GridPegSolitairePuzzle on board shape with a peg in every
+    hole except the one at row and column empty.
+
+    @type shape: str
+    @type empty: (int, int)
+    @type move_set: str
+    @rtype: GridPegSolitairePuzzle
+
+    >>> print(shape_puzzle("#o#/ooo", (1, 1)))
+    #*#
+    *.*
+    """
+    grid = [["#" if hole == "#" else "*" for hole in row]
+            for row in shape.split("/")]
+    assert grid[empty[0]][empty[1]] == "*"
+    grid[empty[0]][empty[1]] = "."
+    return GridPegSolitairePuzzle(grid, {"*", ".", "#"}, move_set)
+
+
+def english_board(empty=(3, 3), move_set="orthogonal"):
+    """
+    Return the 33 hole English cross with the hole at empty, the centre
+    by default, left open.
+
+    @type empty: (int, int)
+    @type move_set: str
+    @rtype: GridPegSolitairePuzzle
+    """
+    return shape_puzzle(ENGLISH_SHAPE, empty, move_set)
+
+
+def european_board(empty=(3, 3), move_set="orthogonal"):
+    """
+    Return the 37 hole European cross with the hole at empty, the centre
+    by default, left open.
+
+    @type empty: (int, int)
+    @type move_set: str
+    @rtype: GridPegSolitairePuzzle
+    """
+    return shape_puzzle(EUROPEAN_SHAPE, empty, move_set)
+
+
+def triangular_board(size=5, empty=(0, 0)):
+    """
+    Return the triangular board with size holes on each side and the
+    hole at empty, the top by default, left open.  Row r uses columns 0
+    to r, and pegs jump along rows, columns and the up-left to
+    down-right lines.
+
+    @type size: int
+    @type empty: (int, int)
+    @rtype: GridPegSolitairePuzzle
+
+    >>> board = triangular_board(4)
+    >>> print(board)
+    .###
+    **##
+    ***#
+    ****
+    >>> board.moves()
+    [(8, 0), (10, 4)]
+    """
+    return shape_puzzle("/".join(["o" * (row + 1) + "#" * (size - row - 1)
+                                  for row in range(size)]),
+                        empty, "triangular")
 
 
-def _available_jumps(grid):
+def _available_jumps(grid, jumps=None):
     """
 
-    Returns a list of boards that you can attain with the legal jumps.
+    Returns a list of boards that you can attain with the legal jumps,
+    trying the jumps from jump_table, for orthogonal moves on the board
+    shape of grid if jumps is None.
 
     @type grid: list[list[str]]
+    @type jumps: tuple[(int, int, int, int)] | None
     @rtype: list[list[list[str]]]
 
     >>> grid_1 = []
@@ -188,45 +551,20 @@ def _available_jumps(grid):
     [[['.', '.', '*', '*', '*'], ['*', '*', '*', '*', '*']], [['*', '*', '*', '.', '.'], ['*', '*', '*', '*', '*']]]
 
     """
+    if jumps is None:
+        jumps = jump_table(board_shape(grid))
+    width = len(grid[0])
+    cells = [marker for row in grid for marker in row]
     new_grids = []
-    for row in range(len(grid)):
-        for col in range(len(grid[row])):
-            # If the given marker is a peg, check for available moves.
-            if grid[row][col] == "*":
-                # If this peg has a peg above it, and that peg has an empty
-                # spot above it, this peg can jump 2 spots up.
-                if ((row - 2) >= 0 and grid[row - 2][col] == "." and
-                        grid[row - 1][col] == "*"):
-                        jump_up_grid = [row.copy() for row in grid]
-                        jump_up_grid[row][col] = "."
-                        jump_up_grid[row - 1][col] = "."
-                        jump_up_grid[row - 2][col] = "*"
-                        new_grids.append(jump_up_grid)
-                # Do the same as above, but with below the given peg.
-                if ((row + 2) < len(grid) and grid[row + 2][col] == "." and
-                        grid[row + 1][col] == "*"):
-                        jump_down_grid = [row.copy() for row in grid]
-                        jump_down_grid[row][col] = "."
-                        jump_down_grid[row + 1][col] = "."
-                        jump_down_grid[row + 2][col] = "*"
-                        new_grids.append(jump_down_grid)
-                # If this peg has a peg to its left, and that peg has a an
-                # empty spot to its left, this peg can jump 2 spots left.
-                if ((col - 2) >= 0 and grid[row][col - 2] == "." and
-                        grid[row][col - 1] == "*"):
-                        jump_left_grid = [[peg for peg in row] for row in grid]
-                        jump_left_grid[row][col] = "."
-                        jump_left_grid[row][col - 1] = "."
-                        jump_left_grid[row][col - 2] = "*"
-                        new_grids.append(jump_left_grid)
-                # Do the same as above, but with the right.
-                if ((col + 2) < len(grid[row]) and grid[row][col + 2] == "." and
-                        grid[row][col + 1] == "*"):
-                        jump_right_grid = [[peg for peg in row] for row in grid]
-                        jump_right_grid[row][col] = "."
-                        jump_right_grid[row][col + 1] = "."
-                        jump_right_grid[row][col + 2] = "*"
-                        new_grids.append(jump_right_grid)
+    for start, over, end, _ in jumps:
+        # A peg can jump over a neighbouring peg into the empty spot
+        # beyond it.
+        if cells[start] == "*" and cells[over] == "*" and cells[end] == ".":
+            new_grid = [row[:] for row in grid]
+            new_grid[start // width][start % width] = "."
+            new_grid[over // width][over % width] = "."
+            new_grid[end // width][end % width] = "*"
+            new_grids.append(new_grid)
     return new_grids
 
 
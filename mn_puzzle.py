@@ -25,6 +25,9 @@ class MNPuzzle(Puzzle):
         # J: setting a variable for row and col
         self.n, self.m = len(from_grid), len(from_grid[0])
         self.from_grid, self.to_grid = from_grid, to_grid
+        # number of blocks out of place, kept up to date by extensions
+        # so is_solved is a single check; counted when first needed
+        self._misplaced = None
 
     def __eq__(self, other):
         """
@@ -102,56 +105,31 @@ class MNPuzzle(Puzzle):
             # Return an empty list.
             return [_ for _ in []]
         else:
-            legal_slides = []
-            for row in range(len(self.n)):
-                # If the given marker is the empty block, check for swaps.
-                if "*" in from_grid[row]:
-                    col = from_grid[row].index("*")
-                    # If this empty block has a block above it, swap the blocks.
-                    if (row - 1) >= 0:
-                        above_block = from_grid[row - 1][col]
-                        copy = [list(r) for r in from_grid]
-                        copy[row - 1][col] = "*"
-                        copy[row][col] = above_block
-                        tuples = [tuple(x) for x in copy]
-                        legal_slides.append(tuples)
-                    # Do the same as above, but with below the given block.
-                    if (row + 1) < len(from_grid):
-                        below_block = from_grid[row + 1][col]
-                        swap_down_grid = [row.copy() for row in from_grid]
-                        swap_down_grid[row][col] = "."
-                        swap_down_grid[row + 1][col] = "."
-                        swap_down_grid[row + 2][col] = "*"
-                        legal_slides.append(swap_down_grid)
-                    # Swap if this empty block has a block to its left.
-                    if (col - 1) >= 0:
-                        left_block = from_grid[row][col - 1]
-                        swap_left_grid = [[peg for peg in row] for row in from_grid]
-                        swap_left_grid[row][col] = "."
-                        swap_left_grid[row][col - 1] = "."
-                        swap_left_grid[row][col - 2] = "*"
-                        legal_slides.append(swap_left_grid)
-                    # Do the same as above, but with the right.
-                    if (col + 1) < len(from_grid[row]):
-                        right_block = from_grid[row][col + 1]
-
-                        swap_right_grid = [[peg for peg in row] for row in from_grid]
-                        swap_right_grid[row][col] = "."
-                        swap_right_grid[row][col + 1] = "."
-                        swap_right_grid[row][col + 2] = "*"
-                        legal_slides.append(swap_right_grid)
-        return [MNPuzzle(new_grid, to_grid) for new_grid in legal_slides]
-        # convenient names
-        from_grid, to_grid = self.from_grid, self.to_grid
-        for j in range(len(from_grid)):
-            if "*" in from_grid[j]:
-                # position of first empty position
-                i = from_grid[j].index("*")
-            # J :need to check bounds and figure out how to switch the symbols
-            allowed_symbols = (tuple(from_grid[j-1][i]), tuple(from_grid[j+1][i]),
-                               tuple(from_grid[j][i+1]), tuple(from_grid[j][i-1]))
-            return ([MNPuzzle(from_grid[:j][:i] + d + from_grid[:j][i + 1:], to_grid)
-                 for d in allowed_symbols])
+            # Position of the empty block.
+            row = [("*" in r) for r in from_grid].index(True)
+            col = from_grid[row].index("*")
+            misplaced = self._count_misplaced()
+            extensions = []
+            # Slide the block above, below, left and right of the empty
+            # block into it, whenever that block is on the grid.
+            for new_row, new_col in ((row - 1, col), (row + 1, col),
+                                     (row, col - 1), (row, col + 1)):
+                if 0 <= new_row < self.n and 0 <= new_col < self.m:
+                    block = from_grid[new_row][new_col]
+                    copy = [list(r) for r in from_grid]
+                    copy[row][col] = block
+                    copy[new_row][new_col] = "*"
+                    extension = MNPuzzle(tuple([tuple(r) for r in copy]),
+                                         to_grid)
+                    # only the two swapped positions can change places
+                    extension._misplaced = (
+                        misplaced -
+                        ("*" != to_grid[row][col]) -
+                        (block != to_grid[new_row][new_col]) +
+                        (block != to_grid[row][col]) +
+                        ("*" != to_grid[new_row][new_col]))
+                    extensions.append(extension)
+            return extensions
 
     def is_solved(self):
         """
@@ -172,7 +150,112 @@ class MNPuzzle(Puzzle):
 
         """
 
-        return self.from_grid == self.to_grid
+        return self._count_misplaced() == 0
+
+    def _count_misplaced(self):
+        # Return the number of blocks of MNPuzzle self out of place,
+        # counting them the first time they are needed.
+        #
+        # @type self: MNPuzzle
+        # @rtype: int
+        if self._misplaced is None:
+            if (len(self.to_grid), len(self.to_grid[0])) != (self.n, self.m):
+                self._misplaced = self.n * self.m
+            else:
+                self._misplaced = sum([a != b for from_row, to_row
+                                       in zip(self.from_grid, self.to_grid)
+                                       for a, b in zip(from_row, to_row)])
+        return self._misplaced
+
+    def encode(self):
+        """
+        Return a bytes key for the from_grid of MNPuzzle self, one byte
+        per block giving the position of its symbol in sorted order.
+
+        @type self: MNPuzzle
+        @rtype: bytes
+
+        >>> grid1 = (("1", "2", "3"), ("4", "5", "*"))
+        >>> grid2 = (("*", "2", "3"), ("1", "4", "5"))
+        >>> mn = MNPuzzle(grid1, grid2)
+        >>> mn.encode()
+        b'\\x01\\x02\\x03\\x04\\x05\\x00'
+        >>> mn.decode(mn.encode()) == mn
+        True
+        """
+        symbols = sorted(sum(self.to_grid, ()))
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        return bytes([index[symbol] for row in self.from_grid
+                      for symbol in row])
+
+    def decode(self, key):
+        """
+        Return the MNPuzzle with the to_grid of MNPuzzle self and the
+        from_grid encoded in key.
+
+        @type self: MNPuzzle
+        @type key: bytes
+        @rtype: MNPuzzle
+        """
+        symbols = sorted(sum(self.to_grid, ()))
+        m = self.m
+        return MNPuzzle(tuple([tuple([symbols[i] for i in key[r:r + m]])
+                               for r in range(0, len(key), m)]),
+                        self.to_grid)
+
+    def family(self):
+        """
+        Return the family of MNPuzzle self, given by its to_grid.
+
+        @type self: MNPuzzle
+        @rtype: str
+
+        >>> goal = (("1", "2"), ("3", "*"))
+        >>> MNPuzzle((("*", "1"), ("3", "2")), goal).family()
+        'MNPuzzle 1,2/3,*'
+        """
+        return "MNPuzzle {}".format("/".join([",".join(row)
+                                              for row in self.to_grid]))
+
+    def move_to(self, extension):
+        """
+        Return the move from MNPuzzle self to extension: the position,
+        counted across the rows, of the block that slides into the empty
+        space.
+
+        @type self: MNPuzzle
+        @type extension: MNPuzzle
+        @rtype: (int,)
+
+        >>> grid1 = (("1", "2", "3"), ("4", "5", "*"))
+        >>> mn = MNPuzzle(grid1, grid1)
+        >>> [mn.move_to(e) for e in mn.extensions()]
+        [(2,), (4,)]
+        >>> mn.make_move((4,)) == mn.extensions()[1]
+        True
+        """
+        blocks = sum(extension.from_grid, ())
+        return (blocks.index("*"),)
+
+    def make_move(self, move):
+        """
+        Return the MNPuzzle reached from MNPuzzle self by move, made by
+        move_to.
+
+        @type self: MNPuzzle
+        @type move: (int,)
+        @rtype: MNPuzzle
+        """
+        blocks = list(sum(self.from_grid, ()))
+        block, empty = move[0], blocks.index("*")
+        assert (abs(block - empty) == self.m or
+                (abs(block - empty) == 1 and
+                 block // self.m == empty // self.m))
+        blocks[empty], blocks[block] = blocks[block], "*"
+        m = self.m
+        return MNPuzzle(tuple([tuple(blocks[r:r + m])
+                               for r in range(0, len(blocks), m)]),
+                        self.to_grid)
 
 
 if __name__ == "__main__":
@@ -180,17 +263,15 @@ if __name__ == "__main__":
     doctest.testmod()
     target_grid = (("1", "2", "3"), ("4", "5", "*"))
     start_grid = (("*", "2", "3"), ("1", "4", "5"))
-    m = MNPuzzle(start_grid, target_grid)
-    m.extensions()
-    # from puzzle_tools import breadth_first_solve, depth_first_solve
-    # from time import time
-    # start = time()
-    # solution = breadth_first_solve(MNPuzzle(start_grid, target_grid))
-    # end = time()
-    # print("BFS solved: \n\n{} \n\nin {} seconds".format(
-    #     solution, end - start))
-    # start = time()
-    # solution = depth_first_solve((MNPuzzle(start_grid, target_grid)))
-    # end = time()
-    # print("DFS solved: \n\n{} \n\nin {} seconds".format(
-    #     solution, end - start))
+    from puzzle_tools import breadth_first_solve, depth_first_solve
+    from time import time
+    start = time()
+    solution = breadth_first_solve(MNPuzzle(start_grid, target_grid))
+    end = time()
+    print("BFS solved: \n\n{} \n\nin {} seconds".format(
+        solution, end - start))
+    start = time()
+    solution = depth_first_solve((MNPuzzle(start_grid, target_grid)))
+    end = time()
+    print("DFS solved: \n\n{} \n\nin {} seconds".format(
+        solution, end - start))
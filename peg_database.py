@@ -0,0 +1,262 @@
+"""
+Databases of the winnable positions of a peg solitaire board shape.
+
+build_database works backwards from every position with a single peg,
+undoing jumps, to find every position of a board shape that can still
+be won.  Positions are the keys made by GridPegSolitairePuzzle.encode,
+read as integers, and are kept as a bitset or a sorted array, whichever
+is smaller.  Once built and saved, a database solves any puzzle on that
+board shape by stepping to winnable extensions, without searching.
+"""
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from grid_peg_solitaire_puzzle import (GridPegSolitairePuzzle, board_shape,
+                                       jump_table)
+from puzzle_tools import PuzzleNode
+
+
+class PegDatabase:
+    """
+    The winnable positions of one peg solitaire board shape.
+
+    === Attributes ===
+    @type shape: str
+        rows of the board, "#" for unused cells and "o" for the others,
+        separated by "/"
+    @type move_set: str
+        key of MOVE_SETS naming the directions pegs may jump in
+    @type count: int
+        number of winnable positions
+
+    >>> grid = [["*", "*", "*", "."]]
+    >>> database = build_database(GridPegSolitairePuzzle(grid, {"*", "."}))
+    >>> database.count
+    9
+    >>> GridPegSolitairePuzzle(grid, {"*", "."}) in database
+    False
+    >>> GridPegSolitairePuzzle([[".", "*", "*", "."]], {"*", "."}) in database
+    True
+    """
+
+    def __init__(self, shape, cells, winnable, count, move_set="orthogonal"):
+        """
+        Create a new PegDatabase self for board shape and move_set with
+        cells usable cells, whose count winnable positions are in
+        winnable: either a bytearray bitset indexed by position or a
+        sorted array of them.
+
+        @type self: PegDatabase
+        @type shape: str
+        @type cells: int
+        @type winnable: bytearray | array
+        @type count: int
+        @type move_set: str
+        @rtype: None
+        """
+        self.shape, self.count, self.move_set = shape, count, move_set
+        self._cells, self._winnable = cells, winnable
+
+    def __contains__(self, puzzle):
+        """
+        Return whether GridPegSolitairePuzzle puzzle can be won.
+
+        @type self: PegDatabase
+        @type puzzle: GridPegSolitairePuzzle
+        @rtype: bool
+        """
+        if board_shape(str(puzzle).split("\n")) != self.shape:
+            raise ValueError("puzzle is not on the board shape {}".format(
+                self.shape))
+        if puzzle.move_set != self.move_set:
+            raise ValueError("puzzle does not use the {} move set".format(
+                self.move_set))
+        return self._has(int.from_bytes(puzzle.encode(), "big"))
+
+    def solve(self, puzzle):
+        """
+        Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+        a solution, with each child containing an extension of the
+        puzzle in its parent, or None if puzzle can not be won.
+
+        Each step takes the first winnable extension, so no search is
+        needed.
+
+        @type self: PegDatabase
+        @type puzzle: GridPegSolitairePuzzle
+        @rtype: PuzzleNode | None
+
+        >>> grid = [["*", "*", "*", "."]]
+        >>> database = build_database(
+        ...     GridPegSolitairePuzzle(grid, {"*", "."}))
+        >>> grid = [[".", "*", "*", "."]]
+        >>> node = database.solve(GridPegSolitairePuzzle(grid, {"*", "."}))
+        >>> [str(p) for p in node.path()]
+        ['.**.', '...*']
+        """
+        if puzzle not in self:
+            return None
+        puzzles = [puzzle]
+        while not puzzles[-1].is_solved():
+            puzzles.append([extension for extension
+                            in puzzles[-1].extensions()
+                            if extension in self][0])
+        node = None
+        for step in reversed(puzzles):
+            node = PuzzleNode(step, [] if node is None else [node])
+        return node
+
+    def save(self, path):
+        """
+        Write PegDatabase self to the file at path, to be read back by
+        load_database.
+
+        The file is a line of JSON describing the database followed by
+        the bitset, or by the sorted positions as little-endian 64 bit
+        integers.
+
+        @type self: PegDatabase
+        @type path: str
+        @rtype: None
+        """
+        bitset = isinstance(self._winnable, bytearray)
+        header = {"shape": self.shape, "cells": self._cells,
+                  "count": self.count, "move_set": self.move_set,
+                  "format": "bitset" if bitset else "sorted"}
+        with open(path, "wb") as out:
+            out.write(json.dumps(header).encode() + b"\n")
+            if bitset:
+                out.write(self._winnable)
+            else:
+                keys = array("Q", self._winnable)
+                if sys.byteorder == "big":
+                    keys.byteswap()
+                out.write(keys.tobytes())
+
+    def _has(self, key):
+        """
+        Return whether the position key is winnable.
+
+        @type self: PegDatabase
+        @type key: int
+        @rtype: bool
+        """
+        winnable = self._winnable
+        if isinstance(winnable, bytearray):
+            return bool((winnable[key >> 3] >> (key & 7)) & 1)
+        i = bisect_left(winnable, key)
+        return i < len(winnable) and winnable[i] == key
+
+
+def build_database(puzzle):
+    """
+    Return the PegDatabase of the board shape and move set of
+    GridPegSolitairePuzzle puzzle, whatever its pegs are.
+
+    Positions are found a peg count at a time, starting from every
+    position with one peg and undoing every jump that could have led to
+    each position, so only one peg count is held in a set at once.
+
+    @type puzzle: GridPegSolitairePuzzle
+    @rtype: PegDatabase
+    """
+    shape = board_shape(str(puzzle).split("\n"))
+    cells = len(shape) - shape.count("#") - shape.count("/")
+    jumps = _jumps(shape, puzzle.move_set)
+    layer = {1 << i for i in range(cells)}
+    layers = []
+    while layer:
+        layers.append(array("Q", sorted(layer)))
+        previous = set()
+        for position in layer:
+            for start, over, end in jumps:
+                # undo a jump from start over over to end
+                if position & end and not position & (start | over):
+                    previous.add(position ^ end | start | over)
+        layer = previous
+    count = sum([len(keys) for keys in layers])
+    size = ((1 << cells) + 7) // 8
+    if size <= count * 8:
+        winnable = bytearray(size)
+        for keys in layers:
+            for key in keys:
+                winnable[key >> 3] |= 1 << (key & 7)
+    else:
+        winnable = array("Q", sorted([key for keys in layers
+                                      for key in keys]))
+    return PegDatabase(shape, cells, winnable, count, puzzle.move_set)
+
+
+def load_database(path):
+    """
+    Return the PegDatabase saved at path by PegDatabase.save.
+
+    @type path: str
+    @rtype: PegDatabase
+
+    >>> import os, tempfile
+    >>> grid = [["*", "*", "*", "."]]
+    >>> database = build_database(GridPegSolitairePuzzle(grid, {"*", "."}))
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     database.save(os.path.join(directory, "line4.db"))
+    ...     loaded = load_database(os.path.join(directory, "line4.db"))
+    >>> loaded.shape, loaded.count
+    ('oooo', 9)
+    """
+    with open(path, "rb") as database:
+        header = json.loads(database.readline().decode())
+        payload = database.read()
+    if header["format"] == "bitset":
+        winnable = bytearray(payload)
+    else:
+        winnable = array("Q")
+        winnable.frombytes(payload)
+        if sys.byteorder == "big":
+            winnable.byteswap()
+    return PegDatabase(header["shape"], header["cells"], winnable,
+                       header["count"], header.get("move_set", "orthogonal"))
+
+
+def _jumps(shape, move_set="orthogonal"):
+    """
+    Return the (start, over, end) bits of every jump on board shape in
+    move_set, numbering cells as GridPegSolitairePuzzle.encode does.
+
+    @type shape: str
+    @type move_set: str
+    @rtype: list[(int, int, int)]
+
+    >>> _jumps("ooo")
+    [(4, 2, 1), (1, 2, 4)]
+    """
+    holes = [i for i, hole in enumerate(shape.replace("/", ""))
+             if hole != "#"]
+    bit = {hole: 1 << (len(holes) - 1 - i) for i, hole in enumerate(holes)}
+    return [(bit[start], bit[over], bit[end])
+            for start, over, end, _ in jump_table(shape, move_set)]
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
+    from time import time
+
+    grid = [["*", "*", "*", "*", "*"],
+            ["*", "*", "*", "*", "*"],
+            ["*", "*", "*", "*", "*"],
+            ["*", "*", ".", "*", "*"],
+            ["*", "*", "*", "*", "*"]]
+    gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    start = time()
+    database = build_database(gpsp)
+    end = time()
+    print("Found {} winnable 5x5 positions in {} seconds.".format(
+        database.count, end - start))
+    database.save("peg_5x5.db")
+    start = time()
+    solution = database.solve(gpsp)
+    end = time()
+    print("Solved 5x5 peg solitaire in {} seconds.".format(end - start))
+    print("Using the database: \n{}".format(solution))
@@ -0,0 +1,276 @@
+"""
+Profile the time puzzles spend in their hook methods during a search.
+
+While a HookProfiler is active, every call to extensions, moves,
+fail_fast and is_solved on any Puzzle subclass is counted and timed,
+separately for each puzzle class, so a slow solve can be traced to move
+generation, to pruning, or to the search itself.  Profiling is opt-in:
+the methods are wrapped only inside a with block, for any solver in
+puzzle_tools, and put back afterwards.
+
+    with HookProfiler("depth_first") as profiler:
+        depth_first_solve(puzzle)
+    print(profiler.report())
+    profiler.write_stacks("search.folded")
+
+The stacks file has a line per solver, class and method holding the
+microseconds spent there, in the folded format flamegraph.pl and
+speedscope read.
+"""
+from array import array
+from time import perf_counter
+from puzzle import Puzzle
+
+# methods of Puzzle that are wrapped
+HOOKS = ("extensions", "moves", "fail_fast", "is_solved")
+
+
+class HookProfiler:
+    """
+    Calls to the hook methods of puzzles, timed while the profiler is
+    active.
+
+    === Attributes ===
+    @type name: str
+        name of what is profiled, the root of every stack
+    @type durations: dict[(str, str), array]
+        seconds taken by each call, by class name and method name
+    @type pruned: dict[str, int]
+        number of fail_fast calls that returned True, by class name
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> from puzzle_tools import breadth_first_solve
+    >>> is_solved = WordLadderPuzzle.is_solved
+    >>> words = {"cat", "cot", "cog", "dog"}
+    >>> with HookProfiler("breadth_first") as profiler:
+    ...     _ = breadth_first_solve(WordLadderPuzzle("cat", "dog", words))
+    >>> profiler.calls("WordLadderPuzzle", "is_solved")
+    4
+    >>> profiler.pruning_ratio("WordLadderPuzzle")
+    0.0
+    >>> WordLadderPuzzle.is_solved is is_solved
+    True
+    """
+
+    def __init__(self, name="search", classes=None):
+        """
+        Create a new HookProfiler self called name that profiles classes,
+        every subclass of Puzzle if classes is None.
+
+        @type self: HookProfiler
+        @type name: str
+        @type classes: list[type] | None
+        @rtype: None
+        """
+        self.name, self.durations, self.pruned = name, {}, {}
+        self._classes = classes
+        self._saved = []
+
+    def __enter__(self):
+        """
+        Start profiling by wrapping the hook methods.
+
+        @type self: HookProfiler
+        @rtype: HookProfiler
+        """
+        classes = self._classes
+        if classes is None:
+            classes = _subclasses(Puzzle)
+        # look up every method before wrapping any, so a subclass does
+        # not wrap the wrapper of the class it inherits from
+        methods = [(cls, hook, getattr(cls, hook))
+                   for cls in classes for hook in HOOKS]
+        for cls, hook, method in methods:
+            self._saved.append((cls, hook, cls.__dict__.get(hook)))
+            setattr(cls, hook, self._wrap(cls.__name__, hook, method))
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Stop profiling by putting back the hook methods.
+
+        @type self: HookProfiler
+        @rtype: bool
+        """
+        for cls, hook, method in reversed(self._saved):
+            if method is None:
+                delattr(cls, hook)
+            else:
+                setattr(cls, hook, method)
+        self._saved = []
+        return False
+
+    def calls(self, cls, hook):
+        """
+        Return how many times method hook of the class named cls was
+        called.
+
+        @type self: HookProfiler
+        @type cls: str
+        @type hook: str
+        @rtype: int
+        """
+        return len(self.durations.get((cls, hook), []))
+
+    def total(self, cls, hook):
+        """
+        Return the seconds spent in method hook of the class named cls.
+
+        @type self: HookProfiler
+        @type cls: str
+        @type hook: str
+        @rtype: float
+        """
+        return sum(self.durations.get((cls, hook), []))
+
+    def percentile(self, cls, hook, percent):
+        """
+        Return the seconds taken by a call of method hook of the class
+        named cls that percent percent of calls took no longer than, or
+        None if there were no calls.
+
+        @type self: HookProfiler
+        @type cls: str
+        @type hook: str
+        @type percent: float
+        @rtype: float | None
+
+        >>> profiler = HookProfiler()
+        >>> profiler.durations[("P", "is_solved")] = array("d", [3, 1, 2, 4])
+        >>> profiler.percentile("P", "is_solved", 50)
+        2.0
+        >>> profiler.percentile("P", "is_solved", 100)
+        4.0
+        """
+        durations = sorted(self.durations.get((cls, hook), []))
+        if not durations:
+            return None
+        rank = max(int(-(-percent * len(durations) // 100)), 1)
+        return durations[rank - 1]
+
+    def pruning_ratio(self, cls):
+        """
+        Return the fraction of fail_fast calls on the class named cls
+        that pruned the puzzle, or None if there were none.
+
+        @type self: HookProfiler
+        @type cls: str
+        @rtype: float | None
+        """
+        calls = self.calls(cls, "fail_fast")
+        if calls == 0:
+            return None
+        return self.pruned.get(cls, 0) / calls
+
+    def as_dict(self):
+        """
+        Return the calls, total seconds and 50th, 90th and 99th
+        percentile seconds of every profiled method, keyed by
+        "class.method", with the pruning ratio of fail_fast.
+
+        @type self: HookProfiler
+        @rtype: dict[str, dict[str, float | int | None]]
+        """
+        result = {}
+        for cls, hook in sorted(self.durations):
+            if not self.durations[(cls, hook)]:
+                continue
+            entry = {"calls": self.calls(cls, hook),
+                     "total": self.total(cls, hook),
+                     "p50": self.percentile(cls, hook, 50),
+                     "p90": self.percentile(cls, hook, 90),
+                     "p99": self.percentile(cls, hook, 99)}
+            if hook == "fail_fast":
+                entry["pruning_ratio"] = self.pruning_ratio(cls)
+            result["{}.{}".format(cls, hook)] = entry
+        return result
+
+    def report(self):
+        """
+        Return a table of the profile, one line per class and method,
+        with times of calls in microseconds.
+
+        @type self: HookProfiler
+        @rtype: str
+        """
+        lines = ["{:38} {:>10} {:>10} {:>9} {:>9} {:>9} {:>7}".format(
+            "method", "calls", "total s", "p50 us", "p90 us", "p99 us",
+            "pruned")]
+        for method, entry in self.as_dict().items():
+            pruned = entry.get("pruning_ratio")
+            lines.append(
+                "{:38} {:>10} {:>10.3f} {:>9.1f} {:>9.1f} {:>9.1f} "
+                "{:>7}".format(
+                    method, entry["calls"], entry["total"],
+                    entry["p50"] * 1e6, entry["p90"] * 1e6,
+                    entry["p99"] * 1e6,
+                    "" if pruned is None else "{:.1%}".format(pruned)))
+        return "\n".join(lines)
+
+    def stacks(self):
+        """
+        Return the profile as lines of folded stacks, the name of
+        HookProfiler self, a class and a method separated by ";",
+        followed by the whole microseconds spent there.
+
+        @type self: HookProfiler
+        @rtype: list[str]
+
+        >>> profiler = HookProfiler("dfs")
+        >>> profiler.durations[("P", "moves")] = array("d", [0.5, 0.25])
+        >>> profiler.stacks()
+        ['dfs;P;moves 750000']
+        """
+        return ["{};{};{} {}".format(self.name, cls, hook,
+                                     round(self.total(cls, hook) * 1e6))
+                for cls, hook in sorted(self.durations)
+                if self.durations[(cls, hook)]]
+
+    def write_stacks(self, path):
+        """
+        Write the lines of stacks to the file at path.
+
+        @type self: HookProfiler
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "w") as out:
+            out.write("".join([line + "\n" for line in self.stacks()]))
+
+    def _wrap(self, cls, hook, method):
+        """
+        Return a function calling method, recording each call as a call
+        of hook on the class named cls.
+
+        @type self: HookProfiler
+        @type cls: str
+        @type hook: str
+        @type method: function
+        @rtype: function
+        """
+        durations = self.durations.setdefault((cls, hook), array("d"))
+        pruned = self.pruned
+
+        def timed(puzzle, *args):
+            before = perf_counter()
+            result = method(puzzle, *args)
+            durations.append(perf_counter() - before)
+            if hook == "fail_fast" and result:
+                pruned[cls] = pruned.get(cls, 0) + 1
+            return result
+        timed.__name__, timed.__doc__ = method.__name__, method.__doc__
+        return timed
+
+
+def _subclasses(cls):
+    """
+    Return every class that inherits from cls.
+
+    @type cls: type
+    @rtype: list[type]
+    """
+    found = []
+    for subclass in cls.__subclasses__():
+        found.append(subclass)
+        found.extend(_subclasses(subclass))
+    return found
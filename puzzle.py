@@ -39,3 +39,107 @@ class Puzzle:
         @rtype: list[Puzzle]
         """
         raise NotImplementedError
+
+    def encode(self):
+        """
+        Return a compact bytes key for the state of Puzzle self.
+
+        Keys of a puzzle and of all the puzzles it can be extended to
+        have the same length, and decode turns a key back into an
+        equivalent Puzzle.  Override this in a subclass so searches can
+        store keys instead of whole puzzles.
+
+        @type self: Puzzle
+        @rtype: bytes
+        """
+        raise NotImplementedError
+
+    def decode(self, key):
+        """
+        Return a Puzzle like Puzzle self, but in the state encoded in key
+        by encode.
+
+        Override this in a subclass along with encode.
+
+        @type self: Puzzle
+        @type key: bytes
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def family(self):
+        """
+        Return a str naming the family of Puzzle self: the puzzles whose
+        keys from encode mean the same states and which are solved in
+        the same way, so a key that can not be solved in one of them can
+        not be solved in any.
+
+        Override this in a subclass along with encode.
+
+        @type self: Puzzle
+        @rtype: str
+        """
+        raise NotImplementedError
+
+    def move_to(self, extension):
+        """
+        Return the move that turns Puzzle self into extension, one of
+        its extensions, as a short tuple of small non-negative ints.
+
+        Override this in a subclass so solutions can be stored as a
+        starting puzzle and a list of moves.
+
+        @type self: Puzzle
+        @type extension: Puzzle
+        @rtype: tuple[int]
+        """
+        raise NotImplementedError
+
+    def make_move(self, move):
+        """
+        Return the extension of Puzzle self that move, made by move_to,
+        leads to.
+
+        Override this in a subclass along with move_to.
+
+        @type self: Puzzle
+        @type move: tuple[int]
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
+
+    def moves(self):
+        """
+        Return the list of moves, in the form made by move_to, that can
+        be made from Puzzle self by apply, or None if Puzzle self can
+        only be extended by extensions.
+
+        Override this, apply and undo in a subclass to let searches
+        change a single puzzle in place instead of making a new puzzle
+        for every extension.
+
+        @type self: Puzzle
+        @rtype: list[tuple[int]] | None
+        """
+        return None
+
+    def apply(self, move):
+        """
+        Change Puzzle self in place by making move, one of moves().
+
+        @type self: Puzzle
+        @type move: tuple[int]
+        @rtype: None
+        """
+        raise NotImplementedError
+
+    def undo(self, move):
+        """
+        Change Puzzle self back in place from before move, which must be
+        the latest move applied and not yet undone.
+
+        @type self: Puzzle
+        @type move: tuple[int]
+        @rtype: None
+        """
+        raise NotImplementedError
@@ -2,83 +2,928 @@
 Some functions for working with puzzles
 """
 from puzzle import Puzzle
-from collections import deque
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# uncomment the next two lines on a unix platform, say CDF
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from time import perf_counter
+import json
+import os
+import sys
+import tempfile
+# recursion limit depth_first_search and _depth_limited_search run with;
+# it is raised only while they run, not when this module is imported.
+# On a unix platform, say CDF, a deep search may also need a bigger stack:
 # import resource
 # resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-import sys
-sys.setrecursionlimit(10**6)
+RECURSION_LIMIT = 10**6
+# bytes of the family number each key of a DeadStateCache is stored behind
+_FAMILY_BYTES = 4
+
+
+@contextmanager
+def _deep_recursion():
+    """
+    Raise the recursion limit to RECURSION_LIMIT while a recursive search
+    runs, and put it back afterwards.
+
+    @rtype: Iterator[None]
+    """
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(limit)
 
-def depth_first_solve(puzzle):
+
+def depth_first_solve(puzzle, stats=None, path_only=False, table_size=None,
+                      dead=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent.  Return None if this is not possible.
 
+    If stats is given, record what the search does in it.  If path_only
+    is True, return just the list of puzzles along the path instead.
+    If table_size is given, remember visited puzzles in a
+    TranspositionTable of that many entries rather than in a set, so
+    memory stays fixed at the cost of revisiting some puzzles.  If dead
+    is given, skip puzzles it holds and add those proven unsolvable.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type stats: SearchStats | None
+    @type path_only: bool
+    @type table_size: int | None
+    @type dead: DeadStateCache | None
+    @rtype: PuzzleNode | list[Puzzle] | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog"}
+    >>> path = depth_first_solve(WordLadderPuzzle("cat", "dog", words),
+    ...                          path_only=True, table_size=2)
+    >>> [str(p) for p in path]
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
     """
-    return depth_first_search(puzzle, set())
+    if table_size is None:
+        visited = set()
+    else:
+        visited = TranspositionTable(table_size)
+    if dead is not None:
+        dead = dead.scope(puzzle)
+    with _deep_recursion():
+        if stats is None:
+            solution = depth_first_search(puzzle, visited, None, dead)
+        else:
+            stats.start()
+            try:
+                solution = depth_first_search(puzzle, visited, stats, dead)
+            finally:
+                stats.stop()
+    if path_only and solution is not None:
+        return solution.path()
+    return solution
+
 
-def depth_first_search(puzzle, visited):
+def depth_first_search(puzzle, visited, stats=None, dead=None):
     """
     Perform a depth first search of this puzzle and its respective extensions,
     returning a PuzzleNode of this puzzle containing a path to a solution. If
     no solution exists, return None.
 
+    Puzzles whose keys are in dead are skipped, and the keys of puzzles
+    proven unsolvable are added to it: those failing fast, those with no
+    extensions, and those whose extensions are all in dead.
+
     @type puzzle: Puzzle
-    @type visited: set
+    @type visited: set | TranspositionTable
+    @type stats: SearchStats | None
+    @type dead: _DeadScope | None
     @rtype: PuzzleNode | None
     """
-    extensions = puzzle.extensions()
     if puzzle.is_solved():
         return PuzzleNode(puzzle)
-    elif not extensions or puzzle.fail_fast():
+    elif dead is not None and puzzle.encode() in dead:
+        if stats is not None:
+            stats.pruned += 1
+        return None
+    elif puzzle.fail_fast():
+        if stats is not None:
+            stats.pruned += 1
+        if dead is not None:
+            dead.add(puzzle.encode())
+        return None
+    if stats is None:
+        extensions = puzzle.extensions()
+    else:
+        extensions = stats.expand(puzzle)
+    if not extensions:
+        if dead is not None:
+            dead.add(puzzle.encode())
         return None
     else:
-        visited.add(str(puzzle))
+        key = str(puzzle)
+        visited.add(key)
+        if stats is not None:
+            stats.see(len(visited))
+            stats.enter()
+        solution = None
         for extension in extensions:
             if not str(extension) in visited:
-                search = depth_first_search(extension, visited)
+                search = depth_first_search(extension, visited, stats, dead)
                 if search is not None:
-                    return PuzzleNode(puzzle, [search])
+                    solution = PuzzleNode(puzzle, [search])
+                    break
+            elif stats is not None:
+                stats.deduplicated += 1
+        if stats is not None:
+            stats.leave()
+        if isinstance(visited, TranspositionTable):
+            visited.leave(key)
+        if (solution is None and dead is not None and
+                all([extension.encode() in dead
+                     for extension in extensions])):
+            dead.add(puzzle.encode())
+        return solution
+
 
-# TODO
-# implement breadth_first_solve
-# do NOT change the type contract
-# you are welcome to create any helper functions
-# you like
-# Hint: you may find a queue useful, that's why
-# we imported deque
-def breadth_first_solve(puzzle):
+def in_place_depth_first_solve(puzzle, stats=None, path_only=False,
+                               dead=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent.  Return None if this is not possible.
+
+    Instead of making a new puzzle for every extension, one copy of
+    puzzle is changed in place by Puzzle.apply and changed back by
+    Puzzle.undo, and the search keeps its own stack rather than
+    recursing, so puzzles are only made for the path that is returned.
+    Puzzles without moves are searched by depth_first_solve instead.
+
+    If stats is given, record what the search does in it.  If path_only
+    is True, return just the list of puzzles along the path instead.  If
+    dead is given, use it as depth_first_solve does.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type path_only: bool
+    @type dead: DeadStateCache | None
+    @rtype: PuzzleNode | list[Puzzle] | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog"}
+    >>> path = in_place_depth_first_solve(
+    ...     WordLadderPuzzle("cat", "dog", words), path_only=True)
+    >>> [str(p) for p in path]
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2"), ("3", "*"))
+    >>> start = MNPuzzle((("1", "2"), ("*", "3")), goal)
+    >>> in_place_depth_first_solve(start).path()[-1].is_solved()
+    True
+    """
+    state = puzzle.decode(puzzle.encode())
+    if state.moves() is None:
+        return depth_first_solve(puzzle, stats, path_only, None, dead)
+    if dead is not None:
+        dead = dead.scope(puzzle)
+    if stats is not None:
+        stats.start()
+    # applied holds the moves from puzzle to state.  pending holds, for
+    # each depth, an iterator over the moves not yet tried, the key of
+    # the puzzle there, and whether every move tried so far led to a
+    # puzzle in dead.
+    visited, applied, pending = set(), [], []
+    solved, key = False, state.encode()
+    while True:
+        if state.is_solved():
+            solved = True
+            break
+        elif (dead is not None and key in dead) or state.fail_fast():
+            if stats is not None:
+                stats.pruned += 1
+            moves = []
+        else:
+            moves = state.moves() if stats is None else stats.expand(state,
+                                                                      True)
+            if moves:
+                visited.add(key)
+                if stats is not None:
+                    stats.see(len(visited))
+        pending.append([iter(moves), key, True])
+        if stats is not None:
+            stats.enter()
+        # apply the next untried move leading to an unvisited puzzle,
+        # backtracking out of depths with no moves left
+        while pending:
+            frame = pending[-1]
+            for move in frame[0]:
+                state.apply(move)
+                key = state.encode()
+                if key not in visited:
+                    applied.append(move)
+                    break
+                if dead is not None and key not in dead:
+                    frame[2] = False
+                state.undo(move)
+                if stats is not None:
+                    stats.deduplicated += 1
+            else:
+                pending.pop()
+                if stats is not None:
+                    stats.leave()
+                if dead is not None:
+                    if frame[2]:
+                        dead.add(frame[1])
+                    elif pending:
+                        pending[-1][2] = False
+                if applied:
+                    state.undo(applied.pop())
+                continue
+            break
+        if not pending:
+            break
+    if stats is not None:
+        for _ in pending:
+            stats.leave()
+        stats.stop()
+    if not solved:
+        return None
+    path = [puzzle]
+    for move in applied:
+        path.append(path[-1].make_move(move))
+    if path_only:
+        return path
+    node = None
+    for step in reversed(path):
+        node = PuzzleNode(step, [] if node is None else [node])
+    return node
+
+
+def breadth_first_solve(puzzle, stats=None, path_only=False, dead=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
+    If stats is given, record what the search does in it.  If path_only
+    is True, return just the list of puzzles along the path instead.  If
+    dead is given, skip puzzles it holds and add those failing fast.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
-    """
-
-    pn = PuzzleNode(puzzle, [])
-    # Adds all the extensions in level-order and excludes repeated cases.
-    possible_sols = pn.extensions()
-    while not level_nodes.is_empty():
-        # Checks the possible extensions
-        node = possible_sols.pop(0)
-        if unseen(node, seen_list=set()):
-            # If it is a solution, it returns the PuzzleNode so that
-            # PuzzleNode.children contains the solution.
-            if node.is_solved():
-                pn.children.append(node)
-                return pn
+    @type stats: SearchStats | None
+    @type path_only: bool
+    @type dead: DeadStateCache | None
+    @rtype: PuzzleNode | list[Puzzle] | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog", "cut"}
+    >>> node = breadth_first_solve(WordLadderPuzzle("cat", "dog", words))
+    >>> path = [str(node.puzzle)]
+    >>> while node.children:
+    ...     node = node.children[0]
+    ...     path.append(str(node.puzzle))
+    >>> path
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
+    >>> path = breadth_first_solve(WordLadderPuzzle("cat", "dog", words),
+    ...                            path_only=True)
+    >>> [str(p) for p in path]
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
+    """
+    if dead is not None:
+        dead = dead.scope(puzzle)
+    if stats is not None:
+        stats.start()
+    # Each queued PuzzleNode only knows its parent until a solution is
+    # found, then the path back to the root is linked through children.
+    root = PuzzleNode(puzzle)
+    frontier = deque([root])
+    seen = {str(puzzle)}
+    solution = None
+    while frontier and solution is None:
+        node = frontier.popleft()
+        if node.puzzle.is_solved():
+            solution = node
+        elif dead is not None and node.puzzle.encode() in dead:
+            if stats is not None:
+                stats.pruned += 1
+        elif node.puzzle.fail_fast():
+            if stats is not None:
+                stats.pruned += 1
+            if dead is not None:
+                dead.add(node.puzzle.encode())
+        else:
+            if stats is None:
+                extensions = node.puzzle.extensions()
             else:
-                return pn.children.append(breadth_first_solve(node))
-    # If the possible_sols is empty, it means no solution was returned and
-    # found.
-    return None
+                extensions = stats.expand(node.puzzle)
+            for extension in extensions:
+                key = str(extension)
+                if key not in seen:
+                    seen.add(key)
+                    frontier.append(PuzzleNode(extension, None, node))
+                elif stats is not None:
+                    stats.deduplicated += 1
+            if stats is not None:
+                stats.see(len(seen), len(frontier))
+    if stats is not None:
+        stats.stop()
+    if solution is None:
+        return None
+    if path_only:
+        puzzles = []
+        while solution is not None:
+            puzzles.append(solution.puzzle)
+            solution = solution.parent
+        puzzles.reverse()
+        return puzzles
+    while solution.parent is not None:
+        solution.parent.children = [solution]
+        solution = solution.parent
+    return solution
+
+
+def iddfs_solve(puzzle, stats=None, path_only=False, max_depth=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child containing an extension of
+    the puzzle in its parent.  Return None if this is not possible.
+
+    Depth first searches are repeated with a growing depth limit, only
+    ruling out puzzles already on the current path, so memory grows
+    with the length of the path rather than the size of the puzzle.
+    If max_depth is given, give up on paths longer than max_depth.
+
+    @type puzzle: Puzzle
+    @type stats: SearchStats | None
+    @type path_only: bool
+    @type max_depth: int | None
+    @rtype: PuzzleNode | list[Puzzle] | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog", "cut", "bat", "bag"}
+    >>> path = iddfs_solve(WordLadderPuzzle("cat", "dog", words), None, True)
+    >>> [str(p) for p in path]
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
+    >>> print(iddfs_solve(WordLadderPuzzle("cat", "dog", words), None,
+    ...                   False, 2))
+    None
+    >>> print(iddfs_solve(WordLadderPuzzle("cat", "bog", words)))
+    None
+    """
+    if stats is not None:
+        stats.start()
+    solution, limit, cutoff = None, 0, True
+    with _deep_recursion():
+        while (solution is None and cutoff and
+               (max_depth is None or limit <= max_depth)):
+            solution, cutoff = _depth_limited_search(puzzle, limit, set(),
+                                                     stats)
+            limit += 1
+    if stats is not None:
+        stats.stop()
+    if path_only and solution is not None:
+        return solution.path()
+    return solution
+
+
+def _depth_limited_search(puzzle, limit, path, stats=None):
+    """
+    Return a PuzzleNode of puzzle containing a path of at most limit
+    extensions to a solution, or None if there is none, paired with
+    whether any path was cut short by limit.  Puzzles whose keys are in
+    path are not revisited.
+
+    @type puzzle: Puzzle
+    @type limit: int
+    @type path: set[str]
+    @type stats: SearchStats | None
+    @rtype: (PuzzleNode | None, bool)
+    """
+    if puzzle.is_solved():
+        return PuzzleNode(puzzle), False
+    elif puzzle.fail_fast():
+        if stats is not None:
+            stats.pruned += 1
+        return None, False
+    elif limit == 0:
+        return None, True
+    if stats is None:
+        extensions = puzzle.extensions()
+    else:
+        extensions = stats.expand(puzzle)
+    key = str(puzzle)
+    path.add(key)
+    if stats is not None:
+        stats.see(len(path))
+        stats.enter()
+    solution, cutoff = None, False
+    for extension in extensions:
+        if str(extension) not in path:
+            search, cut = _depth_limited_search(extension, limit - 1, path,
+                                                stats)
+            cutoff = cutoff or cut
+            if search is not None:
+                solution = PuzzleNode(puzzle, [search])
+                break
+        elif stats is not None:
+            stats.deduplicated += 1
+    path.discard(key)
+    if stats is not None:
+        stats.leave()
+    return solution, cutoff
+
+
+class TranspositionTable:
+    """
+    A fixed-size memory of visited puzzle keys for depth first search.
+
+    Each key is stored in one of capacity slots chosen by its hash, so
+    the table never holds more than capacity keys.  When two keys want
+    the same slot the policy decides which one stays: "depth" keeps the
+    key found nearer the root, whose subtree saved the most work, and
+    "age" keeps the newest key.  Forgotten keys are only searched again,
+    never wrongly skipped.  Keys on the current search path are always
+    remembered, so a search can not run in circles.
+
+    === Attributes ===
+    @type capacity: int
+        number of slots
+    @type policy: str
+        "depth" or "age"
+    @type evictions: int
+        number of keys forgotten to make room for another
+
+    >>> table = TranspositionTable(1)
+    >>> table.add("a")
+    >>> "a" in table, "b" in table
+    (True, False)
+    >>> table.leave("a")
+    >>> table.add("b")
+    >>> "a" in table, "b" in table, table.evictions
+    (False, True, 1)
+    """
+
+    def __init__(self, capacity, policy="depth"):
+        """
+        Create a new empty TranspositionTable self with capacity slots.
+
+        @type self: TranspositionTable
+        @type capacity: int
+        @type policy: str
+        @rtype: None
+        """
+        assert capacity > 0
+        assert policy in ("depth", "age")
+        self.capacity, self.policy, self.evictions = capacity, policy, 0
+        # None marks an empty slot
+        self._keys = [None] * capacity
+        self._depths = array("l", [0]) * capacity
+        self._path, self._used = set(), 0
+
+    def __len__(self):
+        """
+        Return the number of keys remembered by TranspositionTable self.
+
+        @type self: TranspositionTable
+        @rtype: int
+        """
+        return self._used
+
+    def __contains__(self, key):
+        """
+        Return whether TranspositionTable self remembers key.
+
+        @type self: TranspositionTable
+        @type key: str
+        @rtype: bool
+        """
+        return (key in self._path or
+                self._keys[hash(key) % self.capacity] == key)
+
+    def add(self, key):
+        """
+        Remember key, found on the current search path, in
+        TranspositionTable self, until leave(key) is called.
+
+        @type self: TranspositionTable
+        @type key: str
+        @rtype: None
+        """
+        self._path.add(key)
+        i, depth = hash(key) % self.capacity, len(self._path)
+        old = self._keys[i]
+        if old is None:
+            self._used += 1
+        elif old != key:
+            if self.policy == "depth" and self._depths[i] < depth:
+                return
+            self.evictions += 1
+        self._keys[i], self._depths[i] = key, depth
+
+    def leave(self, key):
+        """
+        Record that the search has backtracked past key.  Key stays in
+        TranspositionTable self until another key takes its slot.
+
+        @type self: TranspositionTable
+        @type key: str
+        @rtype: None
+        """
+        self._path.discard(key)
+
+
+class DeadStateCache:
+    """
+    Keys, from Puzzle.encode, of puzzles proven unsolvable, kept for each
+    puzzle family from Puzzle.family so that solves of related puzzles
+    can skip each other's dead ends.  At most capacity keys are kept in
+    all; the least recently used are forgotten first.
+
+    === Attributes ===
+    @type capacity: int
+        most keys kept
+    @type evictions: int
+        number of keys forgotten to make room
+
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> cache = DeadStateCache(100)
+    >>> grid = [["*", "*", ".", ".", "*"]]
+    >>> print(depth_first_solve(GridPegSolitairePuzzle(grid, {"*", "."}),
+    ...                         dead=cache))
+    None
+    >>> len(cache)
+    2
+    >>> grid = [[".", ".", "*", ".", "*"]]
+    >>> GridPegSolitairePuzzle(grid, {"*", "."}).encode() in cache.scope(
+    ...     GridPegSolitairePuzzle(grid, {"*", "."}))
+    True
+
+    A family is forgotten with its last key:
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2"), ("3", "*"))
+    >>> cache = DeadStateCache(1)
+    >>> cache.scope(MNPuzzle(goal, goal)).add(b"\\x00\\x01\\x02\\x03")
+    >>> cache.scope(GridPegSolitairePuzzle(grid, {"*", "."})).add(b"\\x04")
+    >>> len(cache._families), cache.evictions
+    (1, 1)
+    """
+
+    def __init__(self, capacity=1000000):
+        """
+        Create a new empty DeadStateCache self holding at most capacity
+        keys.
+
+        @type self: DeadStateCache
+        @type capacity: int
+        @rtype: None
+        """
+        assert 0 < capacity <= 2 ** (8 * _FAMILY_BYTES)
+        self.capacity, self.evictions = capacity, 0
+        # keys are stored behind the number of their family, and a family
+        # is kept only while it has keys, so there are never more families
+        # than keys and the number of a forgotten family is given out again
+        self._keys, self._families = OrderedDict(), {}
+        self._names, self._counts, self._free = {}, {}, []
+
+    def __len__(self):
+        """
+        Return the number of keys in DeadStateCache self.
+
+        @type self: DeadStateCache
+        @rtype: int
+        """
+        return len(self._keys)
+
+    def scope(self, puzzle):
+        """
+        Return the keys of DeadStateCache self for the family of puzzle,
+        which can be searched with in and added to with add.
+
+        @type self: DeadStateCache
+        @type puzzle: Puzzle
+        @rtype: _DeadScope
+        """
+        return _DeadScope(self, puzzle.family())
+
+    def save(self, path):
+        """
+        Write DeadStateCache self to the file at path, to be read back by
+        load_dead_states, replacing the file only once it is complete.
+
+        The file is a line of JSON holding the families, the size of a
+        family number and the number of keys, followed by each key, least
+        recently used first, as its family number, its length in 2 bytes
+        and the key.
+
+        @type self: DeadStateCache
+        @type path: str
+        @rtype: None
+        """
+        families = list(self._families)
+        numbers = {self._families[family]: i.to_bytes(_FAMILY_BYTES,
+                                                      "little")
+                   for i, family in enumerate(families)}
+        handle, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(handle, "wb") as out:
+                out.write(json.dumps({"families": families,
+                                      "family_bytes": _FAMILY_BYTES,
+                                      "count": len(self._keys)}).encode() +
+                          b"\n")
+                for key in self._keys:
+                    out.write(numbers[key[:_FAMILY_BYTES]] +
+                              (len(key) - _FAMILY_BYTES).to_bytes(
+                                  2, "little") +
+                              key[_FAMILY_BYTES:])
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def _has(self, family, key):
+        """
+        Return whether DeadStateCache self holds key for family, and if
+        so mark it as the most recently used.
+
+        @type self: DeadStateCache
+        @type family: str
+        @type key: bytes
+        @rtype: bool
+        """
+        prefix = self._families.get(family)
+        if prefix is None:
+            return False
+        key = prefix + key
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def _add(self, family, key):
+        """
+        Add key for family to DeadStateCache self, forgetting the least
+        recently used key if it is full, and its family if that was the
+        last key of it.
+
+        @type self: DeadStateCache
+        @type family: str
+        @type key: bytes
+        @rtype: None
+        """
+        prefix = self._families.get(family)
+        if prefix is None:
+            prefix = (self._free.pop() if self._free else
+                      len(self._families).to_bytes(_FAMILY_BYTES, "little"))
+            self._families[family], self._names[prefix] = prefix, family
+            self._counts[prefix] = 0
+        key = prefix + key
+        if key not in self._keys:
+            self._counts[prefix] += 1
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.capacity:
+            prefix = self._keys.popitem(last=False)[0][:_FAMILY_BYTES]
+            self.evictions += 1
+            self._counts[prefix] -= 1
+            if self._counts[prefix] == 0:
+                del self._families[self._names.pop(prefix)]
+                del self._counts[prefix]
+                self._free.append(prefix)
+
+
+class _DeadScope:
+    """
+    The keys of one puzzle family in a DeadStateCache.
+    """
+
+    def __init__(self, cache, family):
+        """
+        Create a new _DeadScope self for the keys of family in cache.
+
+        @type self: _DeadScope
+        @type cache: DeadStateCache
+        @type family: str
+        @rtype: None
+        """
+        self._cache, self._family = cache, family
+
+    def __contains__(self, key):
+        """
+        Return whether key is known to be unsolvable.
+
+        @type self: _DeadScope
+        @type key: bytes
+        @rtype: bool
+        """
+        return self._cache._has(self._family, key)
+
+    def add(self, key):
+        """
+        Record that key is unsolvable.
+
+        @type self: _DeadScope
+        @type key: bytes
+        @rtype: None
+        """
+        self._cache._add(self._family, key)
+
+
+def load_dead_states(path, capacity=1000000):
+    """
+    Return the DeadStateCache saved at path by DeadStateCache.save,
+    holding at most capacity keys.
+
+    @type path: str
+    @type capacity: int
+    @rtype: DeadStateCache
+
+    >>> import os, tempfile
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2"), ("3", "*"))
+    >>> cache = DeadStateCache()
+    >>> cache.scope(MNPuzzle(goal, goal)).add(b"\\x00\\x01\\x02\\x03")
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     cache.save(os.path.join(directory, "dead.bin"))
+    ...     loaded = load_dead_states(os.path.join(directory, "dead.bin"))
+    >>> b"\\x00\\x01\\x02\\x03" in loaded.scope(MNPuzzle(goal, goal))
+    True
+    """
+    cache = DeadStateCache(capacity)
+    with open(path, "rb") as snapshot:
+        header = json.loads(snapshot.readline().decode())
+        # snapshots from before family numbers were widened used 2 bytes
+        width = header.get("family_bytes", 2)
+        for _ in range(header["count"]):
+            family = header["families"][int.from_bytes(snapshot.read(width),
+                                                       "little")]
+            length = int.from_bytes(snapshot.read(2), "little")
+            cache._add(family, snapshot.read(length))
+    return cache
+
+
+class SearchStats:
+    """
+    Counters and timers describing what a solver did.
+
+    === Attributes ===
+    @type expanded: int
+        number of puzzles whose extensions() were generated
+    @type deduplicated: int
+        number of extensions skipped because they were already visited
+    @type pruned: int
+        number of puzzles abandoned because fail_fast() was True
+    @type peak_frontier: int
+        largest number of puzzles waiting to be searched at once
+    @type peak_visited: int
+        largest number of puzzles remembered as visited
+    @type extensions_time: float
+        seconds spent inside extensions()
+    @type total_time: float
+        seconds spent in the solver overall
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog", "dog", "cut"}
+    >>> stats = SearchStats()
+    >>> _ = breadth_first_solve(WordLadderPuzzle("cat", "dog", words), stats)
+    >>> stats.expanded, stats.peak_visited
+    (4, 5)
+    """
+
+    def __init__(self, callback=None, every=1000):
+        """
+        Create a new SearchStats self with all counters at zero.
+
+        If callback is given, it is called with self after every
+        every expanded puzzles, so progress can be reported or exported.
+
+        @type self: SearchStats
+        @type callback: (SearchStats) -> Any | None
+        @type every: int
+        @rtype: None
+        """
+        assert every > 0
+        self.expanded, self.deduplicated, self.pruned = 0, 0, 0
+        self.peak_frontier, self.peak_visited = 0, 0
+        self.extensions_time, self.total_time = 0.0, 0.0
+        self._callback, self._every = callback, every
+        self._depth, self._started = 0, None
+
+    def __str__(self):
+        """
+        Return a human-readable string representation of SearchStats self.
+
+        >>> print(SearchStats())
+        expanded: 0, deduplicated: 0, pruned: 0, peak frontier: 0, \
+peak visited: 0, extensions: 0.000s, bookkeeping: 0.000s
+        """
+        return ("expanded: {}, deduplicated: {}, pruned: {}, "
+                "peak frontier: {}, peak visited: {}, "
+                "extensions: {:.3f}s, bookkeeping: {:.3f}s".format(
+                    self.expanded, self.deduplicated, self.pruned,
+                    self.peak_frontier, self.peak_visited,
+                    self.extensions_time, self.bookkeeping_time()))
+
+    def bookkeeping_time(self):
+        """
+        Return the seconds the solver spent outside of extensions().
+
+        @type self: SearchStats
+        @rtype: float
+        """
+        return max(self.total_time - self.extensions_time, 0.0)
+
+    def as_dict(self):
+        """
+        Return the counters and timers of SearchStats self as a dict.
+
+        @type self: SearchStats
+        @rtype: dict[str, int | float]
+
+        >>> sorted(SearchStats().as_dict())[:3]
+        ['bookkeeping_time', 'deduplicated', 'expanded']
+        """
+        return {"expanded": self.expanded,
+                "deduplicated": self.deduplicated,
+                "pruned": self.pruned,
+                "peak_frontier": self.peak_frontier,
+                "peak_visited": self.peak_visited,
+                "extensions_time": self.extensions_time,
+                "bookkeeping_time": self.bookkeeping_time(),
+                "total_time": self.total_time}
+
+    def start(self):
+        """
+        Start timing a solve.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self._started = perf_counter()
+
+    def stop(self):
+        """
+        Stop timing a solve, adding its duration to total_time.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        if self._started is not None:
+            self.total_time += perf_counter() - self._started
+            self._started = None
+
+    def expand(self, puzzle, moves=False):
+        """
+        Return puzzle.extensions(), or puzzle.moves() if moves is True,
+        counting and timing the call.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @type moves: bool
+        @rtype: list[Puzzle] | list[tuple[int]]
+        """
+        before = perf_counter()
+        extensions = puzzle.moves() if moves else puzzle.extensions()
+        self.extensions_time += perf_counter() - before
+        self.expanded += 1
+        if self._callback is not None and self.expanded % self._every == 0:
+            self._callback(self)
+        return extensions
+
+    def see(self, visited, frontier=None):
+        """
+        Update the peak sizes of the visited set and the frontier.
+
+        @type self: SearchStats
+        @type visited: int
+        @type frontier: int | None
+        @rtype: None
+        """
+        if visited > self.peak_visited:
+            self.peak_visited = visited
+        if frontier is not None and frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+
+    def enter(self):
+        """
+        Record that a depth first search went one level deeper.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self._depth += 1
+        if self._depth > self.peak_frontier:
+            self.peak_frontier = self._depth
+
+    def leave(self):
+        """
+        Record that a depth first search backtracked one level.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self._depth -= 1
 
 
 # Class PuzzleNode helps build trees of PuzzleNodes that have
@@ -88,11 +933,15 @@ class PuzzleNode:
     A Puzzle configuration that refers to other configurations that it
     can be extended to.
     """
+    # solvers build one PuzzleNode per stored puzzle, so keep them small
+    __slots__ = ("puzzle", "children", "parent")
 
     def __init__(self, puzzle=None, children=None, parent=None):
         """
         Create a new puzzle node self with configuration puzzle.
 
+        The list children is used as it is, not copied.
+
         @type self: PuzzleNode
         @type puzzle: Puzzle | None
         @type children: list[PuzzleNode]
@@ -103,7 +952,7 @@ class PuzzleNode:
         if children is None:
             self.children = []
         else:
-            self.children = children[:]
+            self.children = children
 
     def __eq__(self, other):
         """
@@ -121,16 +970,83 @@ class PuzzleNode:
         True
         >>> pn1.__eq__(pn3)
         False
+        >>> pn1.children.append(PuzzleNode(pn3.puzzle))
+        >>> pn1.__eq__(pn2)
+        False
+        >>> pn2.children.append(PuzzleNode(pn3.puzzle))
+        >>> pn1.__eq__(pn2)
+        True
         """
-        return (type(self) == type(other) and
-                self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+        # Two nodes are equivalent when their puzzles are equal and every
+        # child of each is equivalent to some child of the other.  Pairs
+        # of nodes are compared with an explicit stack, so long paths do
+        # not recurse.
+        equal = {}
+        stack = [(self, other)]
+        while stack:
+            a, b = stack[-1]
+            if (id(a), id(b)) in equal:
+                stack.pop()
+            elif not (type(a) == type(b) and a.puzzle == b.puzzle):
+                equal[(id(a), id(b))] = False
+                stack.pop()
+            else:
+                pending = [(x, y) for x in a.children for y in b.children
+                           if (id(x), id(y)) not in equal]
+                if pending:
+                    stack.extend(pending)
+                else:
+                    equal[(id(a), id(b))] = (
+                        all([any([equal[(id(x), id(y))]
+                                  for x in a.children])
+                             for y in b.children]) and
+                        all([any([equal[(id(x), id(y))]
+                                  for y in b.children])
+                             for x in a.children]))
+                    stack.pop()
+        return equal[(id(self), id(other))]
 
     def __str__(self):
         """
         Return a human-readable string representing PuzzleNode self.
-        # doctest not feasible.
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> pn = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "no"}))
+        >>> pn.children.append(PuzzleNode(WordLadderPuzzle("no", "no", {})))
+        >>> str(pn)
+        'on -> no\\n\\nno -> no\\n\\n'
+        """
+        # Each node is its puzzle, a blank line, then its children
+        # separated by newlines; pieces are pushed in reverse on a stack.
+        pieces, stack = [], [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                pieces.append(item)
+            else:
+                pieces.append("{}\n\n".format(item.puzzle))
+                for i in range(len(item.children) - 1, -1, -1):
+                    stack.append(item.children[i])
+                    if i > 0:
+                        stack.append("\n")
+        return "".join(pieces)
+
+    def path(self):
+        """
+        Return the puzzles from PuzzleNode self to the end of its path,
+        following the first child of each node.
+
+        @type self: PuzzleNode
+        @rtype: list[Puzzle]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> pn = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "no"}))
+        >>> pn.children.append(PuzzleNode(WordLadderPuzzle("no", "no", {})))
+        >>> [str(p) for p in pn.path()]
+        ['on -> no', 'no -> no']
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        puzzles, node = [self.puzzle], self
+        while node.children:
+            node = node.children[0]
+            puzzles.append(node.puzzle)
+        return puzzles
@@ -0,0 +1,307 @@
+"""
+Solve a puzzle again after each small edit, reusing the earlier work.
+
+A SolveSession remembers two things between solves:
+
+- the last solution.  From a puzzle on it the search first tries the
+  move the solution made there, so an edit that lands on the old path,
+  such as making one of its moves, replays the rest of it without
+  backtracking.  Elsewhere it tries the moves of the solution first,
+  in the order the solution made them, so a solution the edit left
+  mostly intact, as when a sudoku gains or loses a clue, is repaired
+  from the point where it stops working;
+- the keys of puzzles proven unsolvable: those failing fail_fast,
+  those with no extensions, and those whose every extension was proven
+  unsolvable.  Being unsolvable depends only on the puzzle and its
+  goal, not on where the search started, so this knowledge survives
+  edits that stay in the same family, from Puzzle.family, and is
+  forgotten by edits that change it.  Puzzles skipped only because the
+  search had already seen them are never recorded, so puzzles with
+  moves that can be undone, such as MNPuzzle, are handled correctly.
+
+Searches change one copy of the puzzle with Puzzle.apply and
+Puzzle.undo, and fall back to extensions for puzzles without moves.
+"""
+
+
+class SolveSession:
+    """
+    A puzzle being edited and solved again after each edit.
+
+    === Attributes ===
+    @type puzzle: Puzzle
+        the puzzle to solve
+    @type solution: list[Puzzle] | None
+        the puzzles along the last solution found, if any
+    @type dead: set[bytes]
+        keys, from Puzzle.encode, of puzzles proven unsolvable, when no
+        DeadStateCache is shared
+    @type expanded: int
+        number of puzzles the last solve expanded
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["*", "*", "C", "D"]
+    >>> grid += ["C", "D", "*", "*"]
+    >>> grid += ["*", "*", "D", "C"]
+    >>> grid += ["D", "C", "*", "*"]
+    >>> session = SolveSession(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}))
+    >>> print(session.solve()[-1])
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    >>> grid[0] = "B"
+    >>> session.edit(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}))
+    >>> print(session.solve()[-1])
+    BA|CD
+    CD|AB
+    -----
+    AB|DC
+    DC|BA
+    """
+
+    def __init__(self, puzzle, cache=None):
+        """
+        Create a new SolveSession self for puzzle.  If cache is given,
+        keep the puzzles proven unsolvable there, scoped by the family of
+        each edit, instead of in dead.
+
+        @type self: SolveSession
+        @type puzzle: Puzzle
+        @type cache: DeadStateCache | None
+        @rtype: None
+        """
+        self.puzzle, self.solution = puzzle, None
+        self.dead, self.expanded = set(), 0
+        self._cache = cache
+        self._solved = False
+        # the move the last solution made from each puzzle on it, by key,
+        # and the place in it where each of its moves was first made
+        self._next, self._rank = {}, {}
+
+    def edit(self, puzzle):
+        """
+        Change the puzzle of SolveSession self to puzzle, an edit of it.
+        If puzzle is of another family, with another goal or rules,
+        forget which puzzles are unsolvable.
+
+        @type self: SolveSession
+        @type puzzle: Puzzle
+        @rtype: None
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> words = {"cat", "cot", "cog", "dog"}
+        >>> session = SolveSession(WordLadderPuzzle("cat", "dogs", words))
+        >>> print(session.solve())
+        None
+        >>> session.edit(WordLadderPuzzle("cog", "cat", words))
+        >>> [str(step) for step in session.solve()]
+        ['cog -> cat', 'cot -> cat', 'cat -> cat']
+        """
+        if (type(puzzle) != type(self.puzzle) or
+                puzzle.family() != self.puzzle.family()):
+            self.dead = set()
+        self.puzzle, self._solved = puzzle, False
+
+    def solve(self):
+        """
+        Return the puzzles along a path from the puzzle of SolveSession
+        self to a solution, each an extension of the one before, or None
+        if there is none.
+
+        @type self: SolveSession
+        @rtype: list[Puzzle] | None
+
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> grid = [["*"] * 5 for _ in range(5)]
+        >>> grid[3][2] = "."
+        >>> session = SolveSession(GridPegSolitairePuzzle(grid, {"*", "."}))
+        >>> after_one_move = session.solve()[1]
+        >>> cold = SolveSession(after_one_move)
+        >>> cold.solve() is not None
+        True
+        >>> session.edit(after_one_move)
+        >>> session.solve()[-1].is_solved()
+        True
+        >>> session.expanded < cold.expanded
+        True
+        """
+        if self._solved:
+            return self.solution
+        state = self.puzzle.decode(self.puzzle.encode())
+        if state.moves() is None:
+            state = _Extensions(self.puzzle)
+        if self._cache is None:
+            dead = self.dead
+        else:
+            dead = self._cache.scope(self.puzzle)
+        moves = self._search(state, dead)
+        self._solved = True
+        if moves is None:
+            self.solution = None
+            return None
+        if isinstance(state, _Extensions):
+            self.solution = [self.puzzle] + moves
+            self._next, self._rank = {}, {}
+        else:
+            self.solution = [self.puzzle]
+            for move in moves:
+                self.solution.append(self.solution[-1].make_move(move))
+            self._next = {puzzle.encode(): move
+                          for puzzle, move in zip(self.solution, moves)}
+            self._rank = {}
+            for i, move in enumerate(moves):
+                self._rank.setdefault(move, i)
+        return self.solution
+
+    def _search(self, state, dead):
+        """
+        Return the moves from state to a solution found by a depth first
+        search changing state in place, trying moves in the order given
+        by _order, or None if there is none.  Record the keys of puzzles
+        proven unsolvable in dead.
+
+        @type self: SolveSession
+        @type state: Puzzle
+        @type dead: set[bytes] | _DeadScope
+        @rtype: list[tuple[int]] | None
+        """
+        seen = set()
+        # applied holds the moves from the start to state.  Each frame
+        # holds an iterator over the moves not yet tried from a puzzle on
+        # the path, its key, and whether every move tried so far led to
+        # an unsolvable puzzle.
+        applied, frames = [], []
+        self.expanded = 0
+        while True:
+            key = state.encode()
+            if state.is_solved():
+                return applied
+            moves = [] if state.fail_fast() else state.moves()
+            if moves:
+                self.expanded += 1
+                if self._rank:
+                    moves = self._order(key, moves)
+                seen.add(key)
+                frames.append([iter(moves), key, True])
+            else:
+                dead.add(key)
+                if not applied:
+                    return None
+                state.undo(applied.pop())
+            # apply the next move leading to a puzzle neither seen nor
+            # unsolvable, backtracking out of puzzles with none left
+            while frames:
+                frame = frames[-1]
+                for move in frame[0]:
+                    state.apply(move)
+                    child = state.encode()
+                    if child not in dead and child not in seen:
+                        applied.append(move)
+                        break
+                    if child not in dead:
+                        frame[2] = False
+                    state.undo(move)
+                else:
+                    frames.pop()
+                    if frame[2]:
+                        dead.add(frame[1])
+                    elif frames:
+                        frames[-1][2] = False
+                    if applied:
+                        state.undo(applied.pop())
+                    continue
+                break
+            if not frames:
+                return None
+
+    def _order(self, key, moves):
+        """
+        Return moves, from the puzzle with key, in the order to try
+        them: the move the last solution made from that puzzle, then the
+        moves of the last solution in the order it first made them, then
+        the rest in their own order.
+
+        @type self: SolveSession
+        @type key: bytes
+        @type moves: list[tuple[int]]
+        @rtype: list[tuple[int]]
+        """
+        first, rank = self._next.get(key), self._rank
+        last = len(rank)
+        return sorted(moves, key=lambda move: -1 if move == first
+                      else rank.get(move, last))
+
+
+class _Extensions:
+    """
+    A puzzle without moves, changed in place by stepping to one of its
+    extensions and back.  Its moves are the extensions themselves.
+    """
+
+    def __init__(self, puzzle):
+        """
+        Create a new _Extensions self starting at puzzle.
+
+        @type self: _Extensions
+        @type puzzle: Puzzle
+        @rtype: None
+        """
+        self._path = [puzzle]
+
+    def encode(self):
+        """
+        Return the key of the current puzzle.
+
+        @type self: _Extensions
+        @rtype: bytes
+        """
+        return self._path[-1].encode()
+
+    def is_solved(self):
+        """
+        Return whether the current puzzle is solved.
+
+        @type self: _Extensions
+        @rtype: bool
+        """
+        return self._path[-1].is_solved()
+
+    def fail_fast(self):
+        """
+        Return whether the current puzzle fails fast.
+
+        @type self: _Extensions
+        @rtype: bool
+        """
+        return self._path[-1].fail_fast()
+
+    def moves(self):
+        """
+        Return the extensions of the current puzzle.
+
+        @type self: _Extensions
+        @rtype: list[Puzzle]
+        """
+        return self._path[-1].extensions()
+
+    def apply(self, move):
+        """
+        Step to the extension move.
+
+        @type self: _Extensions
+        @type move: Puzzle
+        @rtype: None
+        """
+        self._path.append(move)
+
+    def undo(self, move):
+        """
+        Step back from the extension move.
+
+        @type self: _Extensions
+        @type move: Puzzle
+        @rtype: None
+        """
+        self._path.pop()
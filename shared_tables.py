@@ -0,0 +1,371 @@
+"""
+Read-only lookup tables kept in one file that every solver process maps
+into memory, instead of each process building its own copy.
+
+A table file, written once by write_tables, holds:
+
+- a dictionary of words, as a sorted array of letter codes for each
+  word length, with the adjacency lists of the words one step from each
+  word, in the order WordLadderPuzzle.extensions tries them;
+- the peers of every position of sudokus of the given sizes.
+
+load_tables maps the file read-only with mmap, so processes loading the
+same file read the same pages of the operating system's file cache, and
+every table is a NumPy view of those pages rather than a copy.  A
+WordLadderPuzzle takes the SharedWords of a table file in place of its
+set of words and finds its moves in the adjacency lists, and
+TableFile.install has count_solutions and remove_clues use the mapped
+peers.  A TableFile pickles as its path, so puzzles sent to worker
+processes map the file again instead of copying the tables.
+
+The file is a line of JSON giving the type, shape and offset of each
+table, then the tables themselves, each starting at a multiple of 8
+bytes after the end of that line padded to a multiple of 8.
+"""
+import json
+import mmap
+import os
+import tempfile
+import numpy as np
+from word_index import _keys
+
+# TableFiles already loaded in this process, by absolute path
+_LOADED = {}
+
+
+class TableFile:
+    """
+    The tables of a table file, mapped read-only into memory.
+
+    === Attributes ===
+    @type path: str
+        absolute path of the table file
+    @type words: SharedWords | None
+        the dictionary of the file, if it has one
+    @type sudoku_sizes: list[int]
+        the sizes of sudoku whose peers the file holds
+
+    >>> import tempfile
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> from puzzle_tools import breadth_first_solve
+    >>> path = os.path.join(tempfile.mkdtemp(), "tables")
+    >>> write_tables(path, {"cat", "cot", "cog", "dog"}, [4])
+    >>> tables = load_tables(path)
+    >>> tables is load_tables(path)
+    True
+    >>> ladder = WordLadderPuzzle("cat", "dog", tables.words)
+    >>> [str(p) for p in breadth_first_solve(ladder, path_only=True)]
+    ['cat -> dog', 'cot -> dog', 'cog -> dog', 'dog -> dog']
+    >>> sorted(tables.peers(4)[0])
+    [1, 2, 3, 4, 5, 8, 12]
+    """
+
+    def __init__(self, path):
+        """
+        Create a new TableFile self by mapping the table file at path.
+
+        @type self: TableFile
+        @type path: str
+        @rtype: None
+        """
+        self.path = os.path.abspath(path)
+        with open(self.path, "rb") as table_file:
+            header = json.loads(table_file.readline().decode("utf-8"))
+            base = -(-table_file.tell() // 8) * 8
+            self._map = mmap.mmap(table_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        self._tables = {}
+        for name, (dtype, shape, offset) in header["tables"].items():
+            count = int(np.prod(shape))
+            self._tables[name] = np.frombuffer(
+                self._map, dtype=dtype, count=count,
+                offset=base + offset).reshape(shape)
+        lengths = header["word_lengths"]
+        self.words = SharedWords(self, lengths) if lengths else None
+        self.sudoku_sizes = header["sudoku_sizes"]
+
+    def __reduce__(self):
+        """
+        Return how to pickle TableFile self: by loading its path again.
+
+        @type self: TableFile
+        @rtype: (function, (str,))
+        """
+        return load_tables, (self.path,)
+
+    def table(self, name):
+        """
+        Return the table called name of TableFile self.
+
+        @type self: TableFile
+        @type name: str
+        @rtype: numpy.ndarray
+        """
+        return self._tables[name]
+
+    def peers(self, n):
+        """
+        Return, for each position of an nxn sudoku, the other positions
+        in its row, column or subsquare, as a view of TableFile self.
+
+        @type self: TableFile
+        @type n: int
+        @rtype: list[memoryview]
+        """
+        return [memoryview(row) for row in self.table("peers {}".format(n))]
+
+    def install(self):
+        """
+        Have the sudoku functions of this process read the peers in
+        TableFile self instead of building their own.
+
+        @type self: TableFile
+        @rtype: None
+        """
+        import sudoku_puzzle
+        for n in self.sudoku_sizes:
+            sudoku_puzzle._PEERS[n] = self.peers(n)
+
+
+class SharedWords:
+    """
+    The dictionary of a table file: a read-only set of words, with the
+    words one step from each word.
+
+    === Attributes ===
+    @type tables: TableFile
+        the table file holding the words
+    """
+
+    def __init__(self, tables, lengths):
+        """
+        Create a new SharedWords self of the words of tables with the
+        given lengths.
+
+        @type self: SharedWords
+        @type tables: TableFile
+        @type lengths: list[int]
+        @rtype: None
+        """
+        self.tables = tables
+        self._codes, self._keys, self._offsets = {}, {}, {}
+        self._steps, self._positions = {}, {}
+        for length in lengths:
+            codes = tables.table("words {}".format(length))
+            self._codes[length] = codes
+            self._keys[length] = codes.view(
+                np.dtype((np.void, length))).ravel()
+            self._offsets[length] = tables.table("offsets {}".format(length))
+            self._steps[length] = tables.table("steps {}".format(length))
+            self._positions[length] = tables.table(
+                "positions {}".format(length))
+
+    def __reduce__(self):
+        """
+        Return how to pickle SharedWords self: as the words of its table
+        file.
+
+        @type self: SharedWords
+        @rtype: (function, (TableFile, str))
+        """
+        return getattr, (self.tables, "words")
+
+    def __contains__(self, word):
+        """
+        Return whether word is in SharedWords self.
+
+        @type self: SharedWords
+        @type word: str
+        @rtype: bool
+        """
+        return self._find(word) >= 0
+
+    def __len__(self):
+        """
+        Return the number of words in SharedWords self.
+
+        @type self: SharedWords
+        @rtype: int
+        """
+        return sum([len(codes) for codes in self._codes.values()])
+
+    def __iter__(self):
+        """
+        Yield the words of SharedWords self, shortest first, and in
+        sorted order for each length.
+
+        @type self: SharedWords
+        @rtype: Iterator[str]
+        """
+        for length in sorted(self._codes):
+            text = self._codes[length].tobytes().decode("latin-1")
+            for i in range(0, len(text), length):
+                yield text[i:i + length]
+
+    def steps(self, word):
+        """
+        Return the moves of a WordLadderPuzzle from word to each word of
+        SharedWords self one step away, as (position, letter code) pairs
+        in the order of WordLadderPuzzle.moves.
+
+        @type self: SharedWords
+        @type word: str
+        @rtype: list[(int, int)]
+
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "tables")
+        >>> write_tables(path, {"cat", "cot", "cut", "bat", "Cat"})
+        >>> words = load_tables(path).words
+        >>> [(i, chr(letter)) for i, letter in words.steps("cat")]
+        [(0, 'b'), (1, 'o'), (1, 'u')]
+        >>> [(i, chr(letter)) for i, letter in words.steps("cit")]
+        [(1, 'a'), (1, 'o'), (1, 'u')]
+        """
+        i = self._find(word)
+        if i < 0:
+            # only words in the file have adjacency lists
+            return [(p, ord(char)) for p in range(len(word))
+                    for char in "abcdefghijklmnopqrstuvwxyz"
+                    if char != word[p] and
+                    word[:p] + char + word[p + 1:] in self]
+        length = len(word)
+        start, end = self._offsets[length][i:i + 2]
+        targets = self._steps[length][start:end]
+        positions = self._positions[length][start:end]
+        return list(zip(positions.tolist(),
+                        self._codes[length][targets, positions].tolist()))
+
+    def _find(self, word):
+        """
+        Return the number of word among the words of its length in
+        SharedWords self, or -1 if it is not there.
+
+        @type self: SharedWords
+        @type word: str
+        @rtype: int
+        """
+        keys = self._keys.get(len(word))
+        if keys is None:
+            return -1
+        try:
+            key = np.void(word.encode("latin-1"))
+        except UnicodeEncodeError:
+            return -1
+        i = int(np.searchsorted(keys, key))
+        return i if i < len(keys) and keys[i] == key else -1
+
+
+def write_tables(path, words=(), sudoku_sizes=()):
+    """
+    Write a table file to path holding words, with their adjacency
+    lists, and the peers of sudokus of each size in sudoku_sizes.  The
+    file at path is replaced only once the new one is complete.
+
+    @type path: str
+    @type words: Iterable[str]
+    @type sudoku_sizes: Iterable[int]
+    @rtype: None
+    """
+    from sudoku_puzzle import _peers
+    tables = {}
+    by_length = {}
+    for word in set(words):
+        if word:
+            by_length.setdefault(len(word), []).append(word)
+    for length, group in sorted(by_length.items()):
+        group.sort()
+        codes = np.frombuffer("".join(group).encode("latin-1"),
+                              dtype=np.uint8).reshape(len(group), length)
+        offsets, steps, positions = _adjacency(codes)
+        tables["words {}".format(length)] = codes
+        tables["offsets {}".format(length)] = offsets
+        tables["steps {}".format(length)] = steps
+        tables["positions {}".format(length)] = positions
+    sudoku_sizes = sorted(set(sudoku_sizes))
+    for n in sudoku_sizes:
+        tables["peers {}".format(n)] = np.array(_peers(n), dtype=np.int32)
+    layout, offset = {}, 0
+    for name, table in tables.items():
+        layout[name] = (table.dtype.str, table.shape, offset)
+        offset += -(-table.nbytes // 8) * 8
+    header = json.dumps({"tables": layout,
+                         "word_lengths": sorted(by_length),
+                         "sudoku_sizes": sudoku_sizes}).encode("utf-8")
+    header += b"\n"
+    # each writer gets its own temporary file, so processes writing the
+    # same path at once do not write into each other's
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(handle, "wb") as out:
+            out.write(header + bytes(-len(header) % 8))
+            for table in tables.values():
+                out.write(table.tobytes() + bytes(-table.nbytes % 8))
+        # mkstemp makes files only their owner can read
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def load_tables(path):
+    """
+    Return the TableFile at path, mapping it only the first time this
+    process loads it.
+
+    @type path: str
+    @rtype: TableFile
+    """
+    key = os.path.abspath(path)
+    if key not in _LOADED:
+        _LOADED[key] = TableFile(key)
+    return _LOADED[key]
+
+
+def _adjacency(codes):
+    """
+    Return the adjacency lists of the words of the (W, length) array of
+    letter codes: the offsets where the list of each word starts, ending
+    with the total, and for each step the number of the word reached and
+    the position of the letter changed.  Each list is ordered by that
+    position and then by the new letter, which must be a to z.
+
+    @type codes: numpy.ndarray
+    @rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+
+    >>> codes = np.frombuffer(b"batcatcot", dtype=np.uint8).reshape(3, 3)
+    >>> [a.tolist() for a in _adjacency(codes)]
+    [[0, 1, 3, 4], [1, 0, 2, 1], [0, 0, 1, 1]]
+    """
+    count, length = codes.shape
+    lower = (codes >= ord("a")) & (codes <= ord("z"))
+    sources, targets, positions = [], [], []
+    for p in range(length):
+        keys = _keys(codes, p)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        # words sharing a key sit together once sorted, so pairs of words
+        # d apart in the order are steps, for every d below the size of
+        # the largest group
+        d = 1
+        while d < count:
+            same = np.flatnonzero(keys[d:] == keys[:-d])
+            if len(same) == 0:
+                break
+            for source, target in ((order[same], order[same + d]),
+                                   (order[same + d], order[same])):
+                keep = lower[target, p]
+                sources.append(source[keep])
+                targets.append(target[keep])
+                positions.append(np.full(keep.sum(), p, dtype=np.uint8))
+            d += 1
+    if sources:
+        source, target = np.concatenate(sources), np.concatenate(targets)
+        position = np.concatenate(positions)
+    else:
+        source = target = np.zeros(0, dtype=np.int64)
+        position = np.zeros(0, dtype=np.uint8)
+    order = np.lexsort((codes[target, position], position, source))
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(source, minlength=count))
+    return (offsets, target[order].astype(np.int32), position[order])
@@ -0,0 +1,143 @@
+"""
+Compact forms of solution paths for sending over the wire.
+
+A path is stored as the key of its first puzzle, from Puzzle.encode,
+and the moves between puzzles, from Puzzle.move_to, so its size grows
+with the number of moves rather than with moves times the size of the
+puzzle.  A path can be written as a line of JSON or as bytes.  Reading
+one back needs a puzzle of the same kind, such as the puzzle that was
+solved, to supply what keys leave out: the goal, symbols or word set.
+
+The bytes form is, all little-endian: the key length as 2 bytes, the
+key, the number of ints in a move as 1 byte, the number of moves as 4
+bytes, then every int of every move as 2 bytes.
+"""
+import json
+import struct
+import sys
+from array import array
+
+
+def path_moves(path):
+    """
+    Return the key of the first puzzle of path and the list of moves
+    between its puzzles.
+
+    @type path: PuzzleNode | list[Puzzle]
+    @rtype: (bytes, list[tuple[int]])
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> words = {"cat", "cot", "cog"}
+    >>> path = [WordLadderPuzzle(w, "cog", words) for w in
+    ...         ("cat", "cot", "cog")]
+    >>> path_moves(path)
+    (b'cat', [(1, 111), (2, 103)])
+    """
+    if not isinstance(path, list):
+        path = path.path()
+    return path[0].encode(), [path[i].move_to(path[i + 1])
+                              for i in range(len(path) - 1)]
+
+
+def follow_moves(puzzle, key, moves):
+    """
+    Return the list of puzzles starting from the puzzle like puzzle
+    encoded in key and following moves.
+
+    @type puzzle: Puzzle
+    @type key: bytes
+    @type moves: list[tuple[int]]
+    @rtype: list[Puzzle]
+    """
+    path = [puzzle.decode(key)]
+    for move in moves:
+        path.append(path[-1].make_move(move))
+    return path
+
+
+def to_json(path):
+    """
+    Return path as a line of JSON, without the newline.
+
+    @type path: PuzzleNode | list[Puzzle]
+    @rtype: str
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> goal = (("1", "2"), ("3", "*"))
+    >>> start = MNPuzzle((("*", "1"), ("3", "2")), goal)
+    >>> line = to_json([start, start.make_move((1,)),
+    ...                 start.make_move((1,)).make_move((3,))])
+    >>> line
+    '{"start": "00010302", "moves": [[1], [3]]}'
+    >>> [str(p) for p in from_json(line, start)][-1] == str(
+    ...     MNPuzzle(goal, goal))
+    True
+    """
+    key, moves = path_moves(path)
+    return json.dumps({"start": key.hex(),
+                       "moves": [list(move) for move in moves]})
+
+
+def from_json(line, puzzle):
+    """
+    Return the list of puzzles written by to_json in line, using
+    puzzle for what keys leave out.
+
+    @type line: str
+    @type puzzle: Puzzle
+    @rtype: list[Puzzle]
+    """
+    path = json.loads(line)
+    return follow_moves(puzzle, bytes.fromhex(path["start"]),
+                        [tuple(move) for move in path["moves"]])
+
+
+def to_bytes(path):
+    """
+    Return path in the bytes form.
+
+    @type path: PuzzleNode | list[Puzzle]
+    @rtype: bytes
+
+    >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+    >>> grid = [[".", "*", "*", "."]]
+    >>> start = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    >>> data = to_bytes([start, start.make_move((1, 3))])
+    >>> len(data)
+    12
+    >>> [str(p) for p in from_bytes(data, start)]
+    ['.**.', '...*']
+    >>> [str(p) for p in from_bytes(to_bytes([start]), start)]
+    ['.**.']
+    """
+    key, moves = path_moves(path)
+    width = len(moves[0]) if moves else 0
+    ints = array("H", [i for move in moves for i in move])
+    if sys.byteorder == "big":
+        ints.byteswap()
+    return (struct.pack("<H", len(key)) + key +
+            struct.pack("<BI", width, len(moves)) + ints.tobytes())
+
+
+def from_bytes(data, puzzle):
+    """
+    Return the list of puzzles written by to_bytes in data, using
+    puzzle for what keys leave out.
+
+    @type data: bytes
+    @type puzzle: Puzzle
+    @rtype: list[Puzzle]
+    """
+    (length,) = struct.unpack_from("<H", data)
+    key = data[2:2 + length]
+    width, count = struct.unpack_from("<BI", data, 2 + length)
+    if width == 0 or count == 0:
+        # a path of one puzzle has no moves
+        return follow_moves(puzzle, key, [])
+    ints = array("H")
+    ints.frombytes(data[7 + length:7 + length + 2 * width * count])
+    if sys.byteorder == "big":
+        ints.byteswap()
+    return follow_moves(puzzle, key,
+                        [tuple(ints[i:i + width])
+                         for i in range(0, len(ints), width)])
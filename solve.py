@@ -0,0 +1,369 @@
+"""
+Solve one puzzle from the command line, as in
+
+    python -m solve sudoku "***7*8*1*..." --solver depth_first
+    python -m solve peg english --solver in_place_depth_first
+    python -m solve mn "12/3*" --solver breadth_first
+    python -m solve ladder cold warm --solver index
+
+Only the modules for the requested kind of puzzle and solver are
+imported, and the word dictionary is read only for word ladders.
+Artifacts that are slow to build, the WordIndex of a dictionary, its
+table file for --tables and the PegDatabase of a board, are kept in a
+cache directory and reused by later runs while their source is
+unchanged.  Startup time, from this module starting to load until the
+puzzle is ready, is reported apart from solve time, since short runs
+spend most of their time in setup.
+"""
+from time import perf_counter
+
+# when this module started loading, taken before anything else is imported
+_LOADING = perf_counter()
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+from argparse import ArgumentParser
+
+# symbols of sudokus up to 16x16, taken in order
+_SYMBOLS = "123456789ABCDEFG"
+
+# directions pegs may jump in, the keys of
+# grid_peg_solitaire_puzzle.MOVE_SETS
+_MOVE_SETS = ("diagonal", "orthogonal", "triangular")
+
+# solvers that take a puzzle, by name, as (module, function)
+_SOLVERS = {"depth_first": ("puzzle_tools", "depth_first_solve"),
+            "breadth_first": ("puzzle_tools", "breadth_first_solve"),
+            "iterative_deepening": ("puzzle_tools", "iddfs_solve"),
+            "in_place_depth_first": ("puzzle_tools",
+                                     "in_place_depth_first_solve")}
+
+
+def sudoku_puzzle(board):
+    """
+    Return the SudokuPuzzle whose rows, read left to right, are board,
+    "*" for an open position.  Rows may be separated by "/".
+
+    @type board: str
+    @rtype: SudokuPuzzle
+
+    >>> print(sudoku_puzzle("12**/**12/2143/3421"))
+    12|**
+    **|12
+    -----
+    21|43
+    34|21
+    """
+    from sudoku_puzzle import SudokuPuzzle
+    symbols = list(board.replace("/", ""))
+    n = round(len(symbols) ** (1 / 2))
+    if n * n != len(symbols) or n > len(_SYMBOLS):
+        raise ValueError("a sudoku board needs n * n positions, n <= 16")
+    return SudokuPuzzle(n, symbols, set(_SYMBOLS[:n]))
+
+
+def peg_puzzle(board, move_set="orthogonal"):
+    """
+    Return the GridPegSolitairePuzzle of board: english, european,
+    triangle, or rows of "*", "." and "#" separated by "/".  Pegs jump
+    in the directions of move_set, except on triangle, where they always
+    jump in the triangular directions.
+
+    @type board: str
+    @type move_set: str
+    @rtype: GridPegSolitairePuzzle
+
+    >>> print(peg_puzzle("**./#**"))
+    **.
+    #**
+    >>> from grid_peg_solitaire_puzzle import MOVE_SETS
+    >>> sorted(MOVE_SETS) == list(_MOVE_SETS)
+    True
+    """
+    import grid_peg_solitaire_puzzle as peg
+    if board == "english":
+        return peg.english_board(move_set=move_set)
+    elif board == "european":
+        return peg.european_board(move_set=move_set)
+    elif board == "triangle":
+        return peg.triangular_board()
+    return peg.GridPegSolitairePuzzle([list(row) for row in board.split("/")],
+                                      {"*", ".", "#"}, move_set)
+
+
+def mn_puzzle(board, goal=None):
+    """
+    Return the MNPuzzle from board to goal, both rows separated by "/".
+    The goal is the symbols of board in sorted order followed by "*" if
+    none is given.
+
+    @type board: str
+    @type goal: str | None
+    @rtype: MNPuzzle
+
+    >>> print(mn_puzzle("*2/31"))
+    *2
+    31
+    """
+    from mn_puzzle import MNPuzzle
+    rows = board.split("/")
+    if goal is None:
+        symbols = sorted(board.replace("/", "").replace("*", "")) + ["*"]
+        width = len(rows[0])
+        goal_rows = [symbols[i:i + width]
+                     for i in range(0, len(symbols), width)]
+    else:
+        goal_rows = goal.split("/")
+    return MNPuzzle(tuple([tuple(row) for row in rows]),
+                    tuple([tuple(row) for row in goal_rows]))
+
+
+def cache_path(cache_dir, name, source):
+    """
+    Return the path in cache_dir for the artifact called name that is
+    built from source, a str, or the file at path source if it exists.
+    The path changes whenever source does.
+
+    @type cache_dir: str
+    @type name: str
+    @type source: str
+    @rtype: str
+    """
+    digest = hashlib.sha1(source.encode())
+    if os.path.exists(source):
+        state = os.stat(source)
+        digest.update("{} {} {}".format(os.path.abspath(source),
+                                        state.st_size,
+                                        state.st_mtime_ns).encode())
+    return os.path.join(cache_dir, "{}-{}".format(name,
+                                                  digest.hexdigest()[:16]))
+
+
+def word_index(words, cache_dir):
+    """
+    Return the WordIndex of the words in the file at path words, from
+    cache_dir if an earlier run built it, otherwise building it and
+    saving it there.
+
+    @type words: str
+    @type cache_dir: str
+    @rtype: WordIndex
+    """
+    path = cache_path(cache_dir, "words", words) + ".pickle"
+    if os.path.exists(path):
+        with open(path, "rb") as cached:
+            return pickle.load(cached)
+    from word_index import WordIndex
+    index = WordIndex(_read_words(words))
+    _save(path, pickle.dumps(index, pickle.HIGHEST_PROTOCOL))
+    return index
+
+
+def shared_words(words, cache_dir):
+    """
+    Return the SharedWords of the words in the file at path words, mapped
+    from a table file in cache_dir, which is written first if no earlier
+    run wrote it.
+
+    @type words: str
+    @type cache_dir: str
+    @rtype: SharedWords
+    """
+    import shared_tables
+    path = cache_path(cache_dir, "words", words) + ".tables"
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        shared_tables.write_tables(path, _read_words(words))
+    return shared_tables.load_tables(path).words
+
+
+def peg_database(puzzle, cache_dir):
+    """
+    Return the PegDatabase of the board of GridPegSolitairePuzzle
+    puzzle, from cache_dir if an earlier run built it, otherwise
+    building it and saving it there.
+
+    @type puzzle: GridPegSolitairePuzzle
+    @type cache_dir: str
+    @rtype: PegDatabase
+    """
+    import peg_database as database
+    from grid_peg_solitaire_puzzle import board_shape
+    path = cache_path(cache_dir, "peg", "{} {}".format(
+        board_shape(str(puzzle).split("\n")), puzzle.move_set)) + ".db"
+    if os.path.exists(path):
+        return database.load_database(path)
+    built = database.build_database(puzzle)
+    os.makedirs(cache_dir, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=cache_dir)
+    os.close(handle)
+    try:
+        built.save(temporary)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return built
+
+
+def main(argv=None):
+    """
+    Solve the puzzle described by the command line arguments argv, print
+    its solution, and print the startup and solve times to stderr as a
+    line of JSON.  Return the exit status, 1 if there is no solution.
+
+    @type argv: list[str] | None
+    @rtype: int
+    """
+    parser = ArgumentParser(description="Solve a puzzle.")
+    parser.add_argument("kind", choices=["sudoku", "peg", "mn", "ladder"])
+    parser.add_argument("board", nargs="+",
+                        help="the board, or the two words of a ladder")
+    parser.add_argument("--solver", default="depth_first",
+                        choices=sorted(_SOLVERS) + ["database", "index"],
+                        help="database solves peg boards from a cached "
+                             "PegDatabase and index solves ladders with "
+                             "a cached WordIndex")
+    parser.add_argument("--goal", help="goal rows of an mn puzzle")
+    parser.add_argument("--move-set", choices=_MOVE_SETS,
+                        help="directions pegs may jump in, orthogonal if "
+                             "not given")
+    parser.add_argument("--words", default="words.txt",
+                        help="dictionary for word ladders")
+    parser.add_argument("--tables", action="store_true",
+                        help="read the dictionary from a table file in the "
+                             "cache directory, shared by every process")
+    parser.add_argument("--cache-dir", default=os.environ.get(
+        "PUZZLE_CACHE", os.path.join(os.path.expanduser("~"), ".cache",
+                                     "puzzles")))
+    parser.add_argument("--dead-states",
+                        help="snapshot of puzzles known to be unsolvable, "
+                             "read before solving and written after")
+    parser.add_argument("--quiet", action="store_true",
+                        help="print only the times")
+    parser.add_argument("--profile", action="store_true",
+                        help="print a profile of the puzzle methods to "
+                             "stderr")
+    parser.add_argument("--stacks", help="write the profile as folded "
+                                         "stacks for a flamegraph here")
+    args = parser.parse_args(argv)
+    if args.solver == "database" and args.kind != "peg":
+        parser.error("the database solver only solves peg boards")
+    if args.solver == "index" and args.kind != "ladder":
+        parser.error("the index solver only solves word ladders")
+    if args.dead_states and args.solver not in _SOLVERS:
+        parser.error("the {} solver does not use dead states".format(
+            args.solver))
+    if args.dead_states and args.solver == "iterative_deepening":
+        parser.error("iterative deepening does not use dead states")
+    if args.move_set is not None and (args.kind != "peg" or
+                                      args.board[0] == "triangle"):
+        parser.error("--move-set only applies to peg boards other than "
+                     "triangle")
+    if args.kind == "ladder" and len(args.board) != 2:
+        parser.error("a ladder needs a from word and a to word")
+
+    if args.kind == "sudoku":
+        puzzle = sudoku_puzzle(args.board[0])
+    elif args.kind == "peg":
+        puzzle = peg_puzzle(args.board[0], args.move_set or "orthogonal")
+    elif args.kind == "mn":
+        puzzle = mn_puzzle(args.board[0], args.goal)
+    elif args.solver == "index":
+        puzzle = word_index(args.words, args.cache_dir)
+    else:
+        from word_ladder_puzzle import WordLadderPuzzle
+        if args.tables:
+            words = shared_words(args.words, args.cache_dir)
+        else:
+            words = _read_words(args.words)
+        puzzle = WordLadderPuzzle(args.board[0], args.board[1], words)
+    if args.solver == "database":
+        solver = peg_database(puzzle, args.cache_dir).solve
+    elif args.solver == "index":
+        def solver(index):
+            return index.ladder(args.board[0], args.board[1])
+    else:
+        module, function = _SOLVERS[args.solver]
+        solver = getattr(__import__(module), function)
+        if args.dead_states:
+            import puzzle_tools
+            if os.path.exists(args.dead_states):
+                dead = puzzle_tools.load_dead_states(args.dead_states)
+            else:
+                dead = puzzle_tools.DeadStateCache()
+            search = solver
+
+            def solver(start):
+                return search(start, dead=dead)
+    ready = perf_counter()
+
+    if args.profile or args.stacks:
+        from profiling import HookProfiler
+        with HookProfiler(args.solver) as profiler:
+            solution = solver(puzzle)
+    else:
+        solution = solver(puzzle)
+    solved = perf_counter()
+    if solution is not None and not isinstance(solution, list):
+        solution = solution.path()
+    if not args.quiet:
+        if solution is None:
+            print("No solution.")
+        else:
+            print("\n\n".join([str(step) for step in solution]))
+    if args.dead_states:
+        dead.save(args.dead_states)
+    if args.profile:
+        print(profiler.report(), file=sys.stderr)
+    if args.stacks:
+        profiler.write_stacks(args.stacks)
+    print(json.dumps({"startup": ready - _LOADING, "solve": solved - ready,
+                      "solved": solution is not None,
+                      "steps": None if solution is None
+                      else len(solution) - 1}), file=sys.stderr)
+    return 0 if solution is not None else 1
+
+
+def _read_words(words):
+    """
+    Return the set of words in the file at path words.
+
+    @type words: str
+    @rtype: set[str]
+    """
+    with open(words, "r") as word_file:
+        return set(word_file.read().split())
+
+
+def _save(path, data):
+    """
+    Write data to the file at path, replacing it only once all of data is
+    written.
+
+    @type path: str
+    @type data: bytes
+    @rtype: None
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # each writer gets its own temporary file, so runs filling the cache
+    # at once do not write into each other's
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, "wb") as out:
+            out.write(data)
+        # mkstemp makes files only their owner can read
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+if __name__ == "__main__":
+    sys.exit(main())
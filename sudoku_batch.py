@@ -0,0 +1,211 @@
+"""
+Check many SudokuPuzzles at once with NumPy array operations.
+
+A SudokuBatch packs the keys from SudokuPuzzle.encode of B puzzles into
+one (B, n, n) array, 0 for "*" and i + 1 for the ith symbol, and works
+out which symbols occupy each row, column and subsquare, how many
+symbols each open position allows, and which boards are solved or can
+never be solved, for every board in a few whole-array operations.
+
+All puzzles in a batch must have the same n and symbol set.
+"""
+import numpy as np
+
+
+class SudokuBatch:
+    """
+    A batch of SudokuPuzzles of the same size and symbols.
+
+    === Attributes ===
+    @type puzzles: list[SudokuPuzzle]
+        the puzzles in the batch, in order
+    @type boards: numpy.ndarray
+        (B, n, n) array of symbol numbers, 0 for an open position
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "D", "A", "B"]
+    >>> grid += ["B", "A", "D", "C"]
+    >>> grid += ["D", "C", "B", "*"]
+    >>> s1 = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "*", "D", "B"]
+    >>> grid += ["B", "A", "*", "C"]
+    >>> grid += ["D", "C", "B", "*"]
+    >>> s2 = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> batch = SudokuBatch([s1, s1.extensions()[0], s2])
+    >>> batch.solved().tolist()
+    [False, True, False]
+    >>> batch.fail_fast().tolist() == [s1.fail_fast(), False, s2.fail_fast()]
+    True
+    >>> batch.candidate_counts()[0].tolist()
+    [[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 1]]
+    """
+
+    def __init__(self, puzzles):
+        """
+        Create a new SudokuBatch self of puzzles.
+
+        @type self: SudokuBatch
+        @type puzzles: list[SudokuPuzzle]
+        @rtype: None
+        """
+        assert len(puzzles) > 0
+        keys = [puzzle.encode() for puzzle in puzzles]
+        if any([len(key) != len(keys[0]) for key in keys]):
+            raise ValueError("puzzles in a batch must be the same size")
+        n = round(len(keys[0]) ** (1 / 2))
+        self.puzzles = puzzles
+        self.boards = np.frombuffer(b"".join(keys),
+                                    dtype=np.uint8).reshape(-1, n, n)
+        self._n, self._r = n, round(n ** (1 / 2))
+        # boards are read-only, so derived arrays are computed only once
+        self._cached_counts, self._cached_candidates = None, None
+
+    def unpack(self, boards=None):
+        """
+        Return SudokuPuzzles for the (B, n, n) boards, or for the boards
+        of SudokuBatch self if boards is None.
+
+        @type self: SudokuBatch
+        @type boards: numpy.ndarray | None
+        @rtype: list[SudokuPuzzle]
+        """
+        if boards is None:
+            boards = self.boards
+        boards = np.ascontiguousarray(boards, dtype=np.uint8)
+        return [self.puzzles[0].decode(board.tobytes()) for board in boards]
+
+    def occupancy(self):
+        """
+        Return three (B, n, n) boolean arrays telling whether symbol
+        number s + 1 appears in row, column and subsquare u of board b,
+        indexed [b, u, s].  Subsquares are numbered across then down.
+
+        @type self: SudokuBatch
+        @rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        """
+        rows, columns, subsquares = self._counts()
+        return rows > 0, columns > 0, subsquares > 0
+
+    def candidates(self):
+        """
+        Return a (B, n, n, n) boolean array telling whether symbol number
+        s + 1 may go in the open position at row i, column j of board b,
+        indexed [b, i, j, s].  Filled positions allow no symbols.
+
+        @type self: SudokuBatch
+        @rtype: numpy.ndarray
+        """
+        if self._cached_candidates is None:
+            rows, columns, subsquares = self.occupancy()
+            b, n, r = len(self.boards), self._n, self._r
+            # spread each subsquare's occupancy over the positions in it
+            by_position = np.repeat(np.repeat(
+                subsquares.reshape(b, r, r, n), r, axis=1), r, axis=2)
+            used = rows[:, :, None, :] | columns[:, None, :, :] | by_position
+            self._cached_candidates = ~used & (self.boards == 0)[..., None]
+        return self._cached_candidates
+
+    def candidate_counts(self):
+        """
+        Return a (B, n, n) array of how many symbols each open position
+        allows, 0 for filled positions.
+
+        @type self: SudokuBatch
+        @rtype: numpy.ndarray
+        """
+        return self.candidates().sum(axis=3)
+
+    def contradictions(self):
+        """
+        Return a (B,) boolean array telling whether a board repeats a
+        symbol in a row, column or subsquare, or has an open position
+        that allows no symbol.
+
+        @type self: SudokuBatch
+        @rtype: numpy.ndarray
+        """
+        rows, columns, subsquares = self._counts()
+        repeated = ((rows > 1).any(axis=(1, 2)) |
+                    (columns > 1).any(axis=(1, 2)) |
+                    (subsquares > 1).any(axis=(1, 2)))
+        return repeated | self.fail_fast()
+
+    def fail_fast(self):
+        """
+        Return a (B,) boolean array of SudokuPuzzle.fail_fast for each
+        board.
+
+        @type self: SudokuBatch
+        @rtype: numpy.ndarray
+        """
+        stuck = (self.boards == 0) & ~self.candidates().any(axis=3)
+        return stuck.any(axis=(1, 2))
+
+    def solved(self):
+        """
+        Return a (B,) boolean array of SudokuPuzzle.is_solved for each
+        board.
+
+        @type self: SudokuBatch
+        @rtype: numpy.ndarray
+        """
+        rows, columns, subsquares = self._counts()
+        return ((rows == 1).all(axis=(1, 2)) &
+                (columns == 1).all(axis=(1, 2)) &
+                (subsquares == 1).all(axis=(1, 2)))
+
+    def results(self):
+        """
+        Return a dict for each puzzle of SudokuBatch self, in order,
+        holding the puzzle, whether it is solved, fails fast or has a
+        contradiction, its number of open positions, and the fewest
+        symbols allowed at any open position (None if there are none).
+
+        @type self: SudokuBatch
+        @rtype: list[dict[str, Any]]
+
+        >>> from sudoku_puzzle import SudokuPuzzle
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> result = SudokuBatch([s]).results()[0]
+        >>> result["puzzle"] is s, result["empty"], result["fewest"]
+        (True, 8, 2)
+        """
+        counts = self.candidate_counts()
+        empty = (self.boards == 0).sum(axis=(1, 2))
+        # open positions allow at most n symbols, so n + 1 marks "none"
+        fewest = np.where(self.boards == 0, counts,
+                          self._n + 1).min(axis=(1, 2))
+        solved, fail_fast = self.solved(), self.fail_fast()
+        contradictions = self.contradictions()
+        return [{"puzzle": puzzle, "solved": bool(solved[b]),
+                 "fail_fast": bool(fail_fast[b]),
+                 "contradiction": bool(contradictions[b]),
+                 "empty": int(empty[b]),
+                 "fewest": None if empty[b] == 0 else int(fewest[b])}
+                for b, puzzle in enumerate(self.puzzles)]
+
+    def _counts(self):
+        """
+        Return three (B, n, n) arrays of how many times symbol number
+        s + 1 appears in row, column and subsquare u of board b,
+        indexed [b, u, s].
+
+        @type self: SudokuBatch
+        @rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        """
+        if self._cached_counts is None:
+            b, n, r = len(self.boards), self._n, self._r
+            one_hot = (self.boards[..., None] ==
+                       np.arange(1, n + 1, dtype=np.uint8)).astype(np.uint8)
+            rows = one_hot.sum(axis=2)
+            columns = one_hot.sum(axis=1)
+            subsquares = one_hot.reshape(b, r, r, r, r, n).sum(
+                axis=(2, 4)).reshape(b, n, n)
+            self._cached_counts = rows, columns, subsquares
+        return self._cached_counts
@@ -1,3 +1,4 @@
+import random
 from puzzle import Puzzle
 
 
@@ -22,6 +23,13 @@ class SudokuPuzzle(Puzzle):
         assert len(symbol_set) == n
         assert len(symbols) == n ** 2
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
+        # number of open positions, handed down by the puzzle this one is
+        # made from so is_solved can usually answer at once; counted when
+        # first needed
+        self._empty = None
+        # "*" followed by the sorted symbol_set, and the place of each in
+        # it, shared with puzzles made from this one; made when first needed
+        self._by_number, self._numbers = None, None
 
     def __eq__(self, other):
         """
@@ -131,14 +139,156 @@ class SudokuPuzzle(Puzzle):
         False
         """
         # convenient names
-        n, symbols = self._n, self._symbols
+        n = self._n
         # no "*" left and all rows, column, subsquares have correct symbols
-        return ("*" not in symbols and
+        return (self._count_empty() == 0 and
                 all([(self._row_set(i) == self._symbol_set and
                       self._column_set(i) == self._symbol_set and
                       self._subsquare_set(i) ==
                       self._symbol_set) for i in range(n ** 2)]))
 
+    def encode(self):
+        """
+        Return a bytes key for SudokuPuzzle self, one byte per position:
+        0 for "*", otherwise 1 more than the place of its symbol in the
+        sorted symbol_set.
+
+        @type self: SudokuPuzzle
+        @rtype: bytes
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> grid += ["*", "D", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> list(s.encode()[:9])
+        [1, 2, 3, 4, 4, 3, 2, 1, 0]
+        >>> s.decode(s.encode()) == s
+        True
+        """
+        numbers = self._numbering()[1]
+        return bytes([numbers[symbol] for symbol in self._symbols])
+
+    def decode(self, key):
+        """
+        Return the SudokuPuzzle with the symbol_set of SudokuPuzzle self
+        and the symbols encoded in key.
+
+        @type self: SudokuPuzzle
+        @type key: bytes
+        @rtype: SudokuPuzzle
+        """
+        by_number = self._numbering()[0]
+        return self._child([by_number[i] for i in key], None)
+
+    def family(self):
+        """
+        Return the family of SudokuPuzzle self, given by n and its
+        symbols.
+
+        @type self: SudokuPuzzle
+        @rtype: str
+
+        >>> SudokuPuzzle(4, ["*"] * 16, {"A", "B", "C", "D"}).family()
+        'SudokuPuzzle 4 A,B,C,D'
+        """
+        return "SudokuPuzzle {} {}".format(self._n,
+                                           ",".join(sorted(self._symbol_set)))
+
+    def move_to(self, extension):
+        """
+        Return the move from SudokuPuzzle self to extension: the
+        position filled, and 1 more than the place of its new symbol in
+        the sorted symbol_set.
+
+        @type self: SudokuPuzzle
+        @type extension: SudokuPuzzle
+        @rtype: (int, int)
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.move_to(s.extensions()[0])
+        (15, 1)
+        >>> s.make_move((15, 1)) == s.extensions()[0]
+        True
+        """
+        i = self._symbols.index("*")
+        return i, self._numbering()[1][extension._symbols[i]]
+
+    def make_move(self, move):
+        """
+        Return the SudokuPuzzle reached from SudokuPuzzle self by move,
+        made by move_to.
+
+        @type self: SudokuPuzzle
+        @type move: (int, int)
+        @rtype: SudokuPuzzle
+        """
+        i, symbol = move
+        assert self._symbols[i] == "*"
+        return self._child(self._symbols[:i] +
+                           [self._numbering()[0][symbol]] +
+                           self._symbols[i + 1:], self._count_empty() - 1)
+
+    def moves(self):
+        """
+        Return the moves that fill the first open position of
+        SudokuPuzzle self with each allowed symbol.
+
+        @type self: SudokuPuzzle
+        @rtype: list[(int, int)]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid[:], {"A", "B", "C", "D"})
+        >>> s.moves()
+        [(15, 1)]
+        >>> s.apply((15, 1))
+        >>> s.is_solved()
+        True
+        >>> s.undo((15, 1))
+        >>> s == SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        True
+        """
+        if self._count_empty() == 0:
+            return []
+        i = self._symbols.index("*")
+        allowed_symbols = (self._symbol_set -
+                           (self._row_set(i) |
+                            self._column_set(i) |
+                            self._subsquare_set(i)))
+        by_number = self._numbering()[0]
+        return [(i, number) for number in range(1, len(by_number))
+                if by_number[number] in allowed_symbols]
+
+    def apply(self, move):
+        """
+        Fill a position of SudokuPuzzle self in place by move.
+
+        @type self: SudokuPuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        i, symbol = move
+        self._empty = self._count_empty() - 1
+        self._symbols[i] = self._numbering()[0][symbol]
+
+    def undo(self, move):
+        """
+        Open the position filled by move in SudokuPuzzle self again.
+
+        @type self: SudokuPuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        self._empty = self._count_empty() + 1
+        self._symbols[move[0]] = "*"
+
     def extensions(self):
         """
         Return list of extensions of SudokuPuzzle self.
@@ -162,8 +312,8 @@ class SudokuPuzzle(Puzzle):
         True
         """
         # convenient names
-        symbols, symbol_set, n = self._symbols, self._symbol_set, self._n
-        if "*" not in symbols:
+        symbols = self._symbols
+        if self._count_empty() == 0:
             # return an empty list
             return [_ for _ in []]
         else:
@@ -176,10 +326,9 @@ class SudokuPuzzle(Puzzle):
                                 self._column_set(i) |
                                 self._subsquare_set(i)))
             # list of SudokuPuzzles with each legal digit at position i
-            return (
-                [SudokuPuzzle(n,
-                 symbols[:i] + [d] + symbols[i + 1:], symbol_set)
-                 for d in allowed_symbols])
+            empty = self._empty - 1
+            return [self._child(symbols[:i] + [d] + symbols[i + 1:], empty)
+                    for d in sorted(allowed_symbols)]
 
     # Notice that it is not possible to complete a sudoku puzzle if there
     # is one open position that has no symbols available to put in it.  In
@@ -209,7 +358,7 @@ class SudokuPuzzle(Puzzle):
         >>> no_solve.fail_fast()
         True
         """
-        if "*" in self._symbols:
+        if self._count_empty():
             i = 0
             illegal_fill = False
             while not illegal_fill and i != len(self._symbols):
@@ -226,6 +375,45 @@ class SudokuPuzzle(Puzzle):
             return False
 
     # some helper methods
+    def _child(self, symbols, empty):
+        #
+        # Return the SudokuPuzzle with symbols, empty of them "*" or None
+        # if not known, and the n and symbol_set of SudokuPuzzle self.
+        #
+        # @type self: SudokuPuzzle
+        # @type symbols: list[str]
+        # @type empty: int | None
+        # @rtype: SudokuPuzzle
+        child = SudokuPuzzle(self._n, symbols, self._symbol_set)
+        child._empty = empty
+        child._by_number, child._numbers = self._by_number, self._numbers
+        return child
+
+    def _count_empty(self):
+        #
+        # Return the number of open positions of SudokuPuzzle self,
+        # counting them the first time they are needed.
+        #
+        # @type self: SudokuPuzzle
+        # @rtype: int
+        if self._empty is None:
+            self._empty = self._symbols.count("*")
+        return self._empty
+
+    def _numbering(self):
+        #
+        # Return "*" followed by the symbols of SudokuPuzzle self in sorted
+        # order, and the place of each symbol in it, making them the first
+        # time they are needed.
+        #
+        # @type self: SudokuPuzzle
+        # @rtype: (tuple[str], dict[str, int])
+        if self._by_number is None:
+            self._by_number = ("*",) + tuple(sorted(self._symbol_set))
+            self._numbers = {symbol: i
+                             for i, symbol in enumerate(self._by_number)}
+        return self._by_number, self._numbers
+
     def _row_set(self, m):
         #
         # Return set of symbols in row of SudokuPuzzle self's symbols
@@ -276,6 +464,189 @@ class SudokuPuzzle(Puzzle):
             [symbols[ul + i + n * j] for i in range(ss) for j in range(ss)])
 
 
+def count_solutions(puzzle, limit=2):
+    """
+    Return the number of solutions of SudokuPuzzle puzzle, counting no
+    further than limit.
+
+    The search fills the open position with the fewest allowed symbols
+    first and gives up on a grid as soon as an open position has none,
+    as fail_fast does, so limit=2 is a quick check that puzzle has
+    exactly one solution.
+
+    @type puzzle: SudokuPuzzle
+    @type limit: int
+    @rtype: int
+
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "D", "A", "B"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> count_solutions(s, 10)
+    4
+    >>> count_solutions(s)
+    2
+    >>> grid[8:12] = ["B", "A", "D", "C"]
+    >>> count_solutions(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}))
+    1
+    >>> grid[12] = "B"
+    >>> count_solutions(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}))
+    0
+    """
+    assert limit > 0
+    grid, full = _bit_grid(puzzle)
+    peers = _peers(puzzle._n)
+    # a symbol given twice in a row, column or subsquare has no solution
+    for i in range(len(grid)):
+        if grid[i] and any([grid[p] == grid[i] for p in peers[i]]):
+            return 0
+    return _count_solutions(grid, peers, full, limit, [])
+
+
+def remove_clues(puzzle, seed=None, min_clues=0):
+    """
+    Yield SudokuPuzzles with the same single solution as SudokuPuzzle
+    puzzle, each with one more clue removed than the one before, until
+    no more clues can be removed or only min_clues are left.
+
+    Clues are tried in an order shuffled by a Random seeded with seed.
+    A clue can be removed when no other symbol at its position leads to
+    a solution, which is quicker than counting solutions from scratch.
+    A clue that could not be removed never can be later, since removing
+    clues only adds solutions, so each clue is tried once.
+
+    @type puzzle: SudokuPuzzle
+    @type seed: int | None
+    @type min_clues: int
+    @rtype: Iterator[SudokuPuzzle]
+
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "D", "A", "B"]
+    >>> grid += ["B", "A", "D", "C"]
+    >>> grid += ["D", "C", "B", "A"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> puzzles = list(remove_clues(s, seed=1))
+    >>> all([count_solutions(p) == 1 for p in puzzles])
+    True
+    >>> str(puzzles[-1]).count("*") == len(puzzles)
+    True
+    """
+    grid, full = _bit_grid(puzzle)
+    peers, solutions = _peers(puzzle._n), []
+    assert _count_solutions(grid, peers, full, 2, solutions) == 1
+    solution = solutions[0]
+    symbols = ["*"] + sorted(puzzle._symbol_set)
+    positions = [i for i in range(len(grid)) if grid[i]]
+    random.Random(seed).shuffle(positions)
+    clues = len(positions)
+    for i in positions:
+        if clues <= min_clues:
+            return
+        grid[i] = 0
+        others = full & ~solution[i]
+        unique = True
+        while others and unique:
+            symbol = others & -others
+            others ^= symbol
+            # another symbol at i must clash with a peer or lead nowhere
+            if not any([grid[p] == symbol for p in peers[i]]):
+                grid[i] = symbol
+                unique = _count_solutions(grid, peers, full, 1, []) == 0
+                grid[i] = 0
+        if unique:
+            clues -= 1
+            yield SudokuPuzzle(puzzle._n,
+                               [symbols[b.bit_length()] for b in grid],
+                               puzzle._symbol_set)
+        else:
+            grid[i] = solution[i]
+
+
+# peer positions of every position, for each size of grid used so far
+_PEERS = {}
+
+
+def _peers(n):
+    """
+    Return, for each position of an nxn sudoku, the tuple of the other
+    positions in its row, column or subsquare.
+
+    @type n: int
+    @rtype: list[tuple[int]]
+
+    >>> sorted(_peers(4)[0])
+    [1, 2, 3, 4, 5, 8, 12]
+    """
+    if n not in _PEERS:
+        r = round(n ** (1 / 2))
+        peers = []
+        for m in range(n ** 2):
+            row, col = m // n, m % n
+            ul = ((row // r) * r) * n + (col // r) * r
+            same = ({row * n + i for i in range(n)} |
+                    {col + i * n for i in range(n)} |
+                    {ul + i + n * j for i in range(r) for j in range(r)})
+            peers.append(tuple(same - {m}))
+        _PEERS[n] = peers
+    return _PEERS[n]
+
+
+def _bit_grid(puzzle):
+    """
+    Return the symbols of SudokuPuzzle puzzle as bits, 0 for "*" and
+    1 << i for the ith symbol in sorted order, along with the bits of
+    every symbol together.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: (list[int], int)
+    """
+    bits = {symbol: 1 << i
+            for i, symbol in enumerate(sorted(puzzle._symbol_set))}
+    bits["*"] = 0
+    return [bits[symbol] for symbol in puzzle._symbols], (1 << puzzle._n) - 1
+
+
+def _count_solutions(grid, peers, full, limit, solutions):
+    """
+    Return the number of ways, up to limit, to fill the 0 positions of
+    the bit grid with symbols allowed by their peers, appending the
+    first solution found to solutions.  Grid is left as it was.
+
+    @type grid: list[int]
+    @type peers: list[tuple[int]]
+    @type full: int
+    @type limit: int
+    @type solutions: list[list[int]]
+    @rtype: int
+    """
+    best, best_allowed, fewest = None, 0, None
+    for i in range(len(grid)):
+        if not grid[i]:
+            used = 0
+            for p in peers[i]:
+                used |= grid[p]
+            allowed = full & ~used
+            if not allowed:
+                return 0
+            count = bin(allowed).count("1")
+            if fewest is None or count < fewest:
+                best, best_allowed, fewest = i, allowed, count
+    if best is None:
+        if not solutions:
+            solutions.append(grid[:])
+        return 1
+    total = 0
+    while best_allowed and total < limit:
+        symbol = best_allowed & -best_allowed
+        best_allowed ^= symbol
+        grid[best] = symbol
+        total += _count_solutions(grid, peers, full, limit - total,
+                                  solutions)
+    grid[best] = 0
+    return total
+
+
 if __name__ == "__main__":
     import doctest
 
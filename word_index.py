@@ -0,0 +1,212 @@
+"""
+A dictionary of words stored as NumPy arrays, for finding word ladder
+steps for many words at once.
+
+Words of each length are kept as rows of a 2-D uint8 array of their
+latin-1 bytes.  For each letter position, every word also has a key made
+of its other letters, so two words are one step apart exactly when they
+differ and share the key of some position.  The words one step from a
+word, or from every word of a breadth first search frontier, are found
+by sorting the frontier's keys and looking up the whole dictionary's
+keys in them at once, instead of trying each changed letter in a set.
+
+A step follows WordLadderPuzzle.extensions: exactly one letter changes,
+and the new letter is one of a to z.
+"""
+import numpy as np
+
+
+class WordIndex:
+    """
+    Words grouped by length as arrays of letter codes.
+
+    >>> index = WordIndex({"cat", "cot", "cog", "dog", "cut", "Cat"})
+    >>> index.neighbours("cat")
+    ['cot', 'cut']
+    >>> index.ladder("cat", "dog")
+    ['cat', 'cot', 'cog', 'dog']
+    >>> [sorted(layer) for layer in index.layers("dog")]
+    [['dog'], ['cog'], ['cot'], ['cat', 'cut']]
+    """
+
+    def __init__(self, words):
+        """
+        Create a new WordIndex self of words.
+
+        @type self: WordIndex
+        @type words: Iterable[str]
+        @rtype: None
+        """
+        by_length = {}
+        for word in set(words):
+            by_length.setdefault(len(word), []).append(word)
+        self._words, self._codes, self._position = {}, {}, {}
+        self._keys, self._lower = {}, {}
+        for length, group in by_length.items():
+            group.sort()
+            codes = np.frombuffer("".join(group).encode("latin-1"),
+                                  dtype=np.uint8).reshape(len(group), length)
+            self._words[length], self._codes[length] = group, codes
+            self._position[length] = {w: i for i, w in enumerate(group)}
+            self._keys[length] = [_keys(codes, p) for p in range(length)]
+            self._lower[length] = (codes >= ord("a")) & (codes <= ord("z"))
+
+    def __contains__(self, word):
+        """
+        Return whether word is in WordIndex self.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: bool
+        """
+        return word in self._position.get(len(word), {})
+
+    def neighbours(self, word):
+        """
+        Return the words of WordIndex self one step from word, in sorted
+        order.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: list[str]
+        """
+        length = len(word)
+        if length not in self._words:
+            return []
+        query = np.frombuffer(word.encode("latin-1"), dtype=np.uint8)
+        found, _ = self._steps(length, query[None, :])
+        if word in self:
+            found[self._position[length][word]] = False
+        return [self._words[length][i] for i in np.flatnonzero(found)]
+
+    def layers(self, word):
+        """
+        Yield the lists of words of WordIndex self that are 0, 1, 2, ...
+        steps from word, expanding a whole layer of the search at once.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: Iterator[list[str]]
+        """
+        for layer, _ in self._search(word, None):
+            yield [self._words[len(word)][i] for i in layer]
+
+    def ladder(self, from_word, to_word):
+        """
+        Return a shortest list of words from from_word to to_word, each
+        one step from the one before, or None if there is none.
+
+        @type self: WordIndex
+        @type from_word: str
+        @type to_word: str
+        @rtype: list[str] | None
+        """
+        if from_word == to_word:
+            return [from_word]
+        if len(from_word) != len(to_word) or to_word not in self:
+            return None
+        goal = self._position[len(to_word)][to_word]
+        for layer, parent in self._search(from_word, goal):
+            if goal in layer:
+                path, i = [], goal
+                while i >= 0:
+                    path.append(self._words[len(to_word)][i])
+                    i = parent[i]
+                path.reverse()
+                if path[0] != from_word:
+                    # from_word is not itself in the index
+                    path.insert(0, from_word)
+                return path
+        return None
+
+    def _search(self, word, goal):
+        """
+        Yield each layer of a breadth first search from word as an array
+        of word numbers, along with the array holding the number of the
+        word each was reached from, -1 for none.  Stop after the layer
+        holding the word numbered goal.
+
+        @type self: WordIndex
+        @type word: str
+        @type goal: int | None
+        @rtype: Iterator[(numpy.ndarray, numpy.ndarray)]
+        """
+        length = len(word)
+        if length not in self._words:
+            return
+        codes = self._codes[length]
+        parent = np.full(len(codes), -1, dtype=np.int64)
+        visited = np.zeros(len(codes), dtype=bool)
+        if word in self:
+            frontier = np.array([self._position[length][word]])
+            visited[frontier] = True
+            yield frontier, parent
+            queries = codes[frontier]
+        else:
+            frontier = np.array([], dtype=np.int64)
+            queries = np.frombuffer(word.encode("latin-1"),
+                                    dtype=np.uint8)[None, :]
+        while len(queries) and (goal is None or not visited[goal]):
+            found, source = self._steps(length, queries, visited)
+            if len(frontier):
+                parent[found] = frontier[source[found]]
+            frontier = np.flatnonzero(found)
+            if len(frontier) == 0:
+                return
+            visited |= found
+            yield frontier, parent
+            queries = codes[frontier]
+
+    def _steps(self, length, queries, visited=None):
+        """
+        Return a boolean array telling which words of the given length,
+        not marked in visited, are one step from a word in the (Q, length)
+        array queries, along with the array of the query each one was
+        found from.
+
+        Words equal to a query are found too, unless they are visited.
+
+        @type self: WordIndex
+        @type length: int
+        @type queries: numpy.ndarray
+        @type visited: numpy.ndarray | None
+        @rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        size = len(self._codes[length])
+        found = np.zeros(size, dtype=bool)
+        source = np.zeros(size, dtype=np.int64)
+        for p in range(length):
+            query_keys = _keys(queries, p)
+            order = np.argsort(query_keys, kind="stable")
+            query_keys = query_keys[order]
+            keys = self._keys[length][p]
+            at = np.minimum(np.searchsorted(query_keys, keys),
+                            len(query_keys) - 1)
+            # the word's letter at p, the only one it may change, is a to z
+            new = ((query_keys[at] == keys) & self._lower[length][:, p] &
+                   ~found)
+            if visited is not None:
+                new &= ~visited
+            source[new] = order[at[new]]
+            found |= new
+        return found, source
+
+
+def _keys(codes, p):
+    """
+    Return the keys made of the letters of each row of the 2-D array of
+    letter codes, leaving out position p, as an array of byte strings.
+
+    @type codes: numpy.ndarray
+    @type p: int
+    @rtype: numpy.ndarray
+
+    >>> codes = np.frombuffer(b"catcot", dtype=np.uint8).reshape(2, 3)
+    >>> _keys(codes, 1).tolist()
+    [b'ct', b'ct']
+    """
+    if codes.shape[1] == 1:
+        # one-letter words share their key, the empty word
+        return np.zeros(len(codes), dtype=np.dtype((np.void, 1)))
+    rest = np.ascontiguousarray(np.delete(codes, p, axis=1))
+    return rest.view(np.dtype((np.void, codes.shape[1] - 1))).ravel()
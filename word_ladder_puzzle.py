@@ -1,4 +1,5 @@
 from puzzle import Puzzle
+from zlib import crc32
 
 
 class WordLadderPuzzle(Puzzle):
@@ -9,18 +10,20 @@ class WordLadderPuzzle(Puzzle):
     def __init__(self, from_word, to_word, ws):
         """
         Create a new word-ladder puzzle with the aim of stepping
-        from from_word to to_word using words in ws, changing one
-        character at each step.
+        from from_word to to_word using words in ws, a set or the
+        SharedWords of a table file, changing one character at each step.
 
         @type from_word: str
         @type to_word: str
-        @type ws: set[str]
+        @type ws: set[str] | SharedWords
         @rtype: None
         """
         (self._from_word, self._to_word, self._word_set) = (from_word,
                                                             to_word, ws)
         # set of characters to use for 1-character changes
         self._chars = "abcdefghijklmnopqrstuvwxyz"
+        # letters replaced by apply, latest last, for undo
+        self._replaced = []
 
     def __eq__(self, other):
         """
@@ -96,13 +99,17 @@ class WordLadderPuzzle(Puzzle):
                                            self._word_set, self._chars)
         if from_word == to_word or len(from_word) != len(to_word):
             return []
+        elif hasattr(set_, "steps"):
+            # a SharedWords lists the steps from each word
+            legal_words = [from_word[:i] + chr(letter) + from_word[i + 1:]
+                           for i, letter in set_.steps(from_word)]
         # Generate a list of all legal words that are possible to reach by
         # changing one character in the from_word of this WordLadderPuzzle.
         else:
             legal_words = []
             for i in range(len(from_word)):
                 trial_words = [(from_word[:i] + char + from_word[i + 1:]) for
-                               char in (set(chars) - set(from_word[i]))]
+                               char in chars if char != from_word[i]]
                 legal_words += [word for word in trial_words if word in set_]
         return [WordLadderPuzzle(from_, to_word, set_) for from_ in legal_words]
 
@@ -123,13 +130,146 @@ class WordLadderPuzzle(Puzzle):
         """
         return True if self._from_word == self._to_word else False
 
+    def encode(self):
+        """
+        Return the from_word of WordLadderPuzzle self as a bytes key.
+
+        @type self: WordLadderPuzzle
+        @rtype: bytes
+
+        >>> ladder = WordLadderPuzzle("café", "cafe", {"café", "cafe"})
+        >>> ladder.encode()
+        b'caf\\xe9'
+        >>> ladder.decode(ladder.encode()) == ladder
+        True
+        """
+        # every letter in words.txt fits in one latin-1 byte
+        return self._from_word.encode("latin-1")
+
+    def decode(self, key):
+        """
+        Return the WordLadderPuzzle with the to_word and word set of
+        WordLadderPuzzle self, starting from the word encoded in key.
+
+        @type self: WordLadderPuzzle
+        @type key: bytes
+        @rtype: WordLadderPuzzle
+        """
+        return WordLadderPuzzle(key.decode("latin-1"), self._to_word,
+                                self._word_set)
+
+    def family(self):
+        """
+        Return the family of WordLadderPuzzle self, given by its to_word
+        and a checksum of its word set.
+
+        @type self: WordLadderPuzzle
+        @rtype: str
+
+        >>> WordLadderPuzzle("cat", "dog", {"cat", "cot", "dog"}).family()
+        'WordLadderPuzzle dog 3 2067eb4b'
+        """
+        # the sum of each word's crc32 does not depend on the set's order
+        checksum = sum([crc32(word.encode("utf-8"))
+                        for word in self._word_set]) & 0xffffffff
+        return "WordLadderPuzzle {} {} {:08x}".format(
+            self._to_word, len(self._word_set), checksum)
+
+    def move_to(self, extension):
+        """
+        Return the move from WordLadderPuzzle self to extension: the
+        position of the letter changed and the code of the new letter.
+
+        @type self: WordLadderPuzzle
+        @type extension: WordLadderPuzzle
+        @rtype: (int, int)
+
+        >>> ladder = WordLadderPuzzle("cape", "cope", {"cape", "cope"})
+        >>> ladder.move_to(ladder.extensions()[0])
+        (1, 111)
+        >>> print(ladder.make_move((1, 111)))
+        cope -> cope
+        """
+        old, new = self._from_word, extension._from_word
+        i = [old[j] != new[j] for j in range(len(old))].index(True)
+        return i, ord(new[i])
+
+    def make_move(self, move):
+        """
+        Return the WordLadderPuzzle reached from WordLadderPuzzle self by
+        move, made by move_to.
+
+        @type self: WordLadderPuzzle
+        @type move: (int, int)
+        @rtype: WordLadderPuzzle
+        """
+        i, letter = move
+        word = self._from_word[:i] + chr(letter) + self._from_word[i + 1:]
+        assert word in self._word_set
+        return WordLadderPuzzle(word, self._to_word, self._word_set)
+
+    def moves(self):
+        """
+        Return the moves to every word one letter away from the from_word
+        of WordLadderPuzzle self, in the same order as extensions.
+
+        @type self: WordLadderPuzzle
+        @rtype: list[(int, int)]
+
+        >>> ladder = WordLadderPuzzle("cape", "cope", {"cape", "cope"})
+        >>> ladder.moves()
+        [(1, 111)]
+        >>> ladder.apply((1, 111))
+        >>> ladder.is_solved()
+        True
+        >>> ladder.undo((1, 111))
+        >>> print(ladder)
+        cape -> cope
+        """
+        from_word, to_word, set_ = (self._from_word, self._to_word,
+                                    self._word_set)
+        if from_word == to_word or len(from_word) != len(to_word):
+            return []
+        if hasattr(set_, "steps"):
+            return set_.steps(from_word)
+        return [(i, ord(char)) for i in range(len(from_word))
+                for char in self._chars if char != from_word[i] and
+                from_word[:i] + char + from_word[i + 1:] in set_]
+
+    def apply(self, move):
+        """
+        Change a letter of the from_word of WordLadderPuzzle self in
+        place by move.
+
+        @type self: WordLadderPuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        i, letter = move
+        self._replaced.append(self._from_word[i])
+        self._from_word = (self._from_word[:i] + chr(letter) +
+                           self._from_word[i + 1:])
+
+    def undo(self, move):
+        """
+        Change back the letter of the from_word of WordLadderPuzzle self
+        changed by move.
+
+        @type self: WordLadderPuzzle
+        @type move: (int, int)
+        @rtype: None
+        """
+        i = move[0]
+        self._from_word = (self._from_word[:i] + self._replaced.pop() +
+                           self._from_word[i + 1:])
+
 
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
     from puzzle_tools import breadth_first_solve, depth_first_solve
     from time import time
-    with open("words", "r") as words:
+    with open("words.txt", "r") as words:
         word_set = set(words.read().split())
     w = WordLadderPuzzle("same", "cost", word_set)
     start = time()